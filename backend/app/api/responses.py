@@ -0,0 +1,67 @@
+"""Fast JSON responses with negotiated compression for large list/text payloads.
+
+Rows are serialized straight from projected query results with orjson, skipping the
+``response_model`` re-validation FastAPI would otherwise do. Bodies above
+``TAXGPT_COMPRESSION_MIN_BYTES`` are compressed with brotli (when installed and accepted
+by the client) or gzip.
+"""
+
+import gzip
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: pip install taxgpt-backend[brotli]
+    brotli = None
+
+from app.core.config import settings
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # much faster than the default 11 at a small size cost
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    """Content codings the client accepts, ignoring any it marked with ``q=0``."""
+
+    encodings: set[str] = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(coding.lower())
+    return encodings
+
+
+def compress_body(request: Request, body: bytes) -> tuple[bytes, str | None]:
+    """Compress ``body`` with the best coding the client accepts, if it is large enough."""
+
+    if len(body) < settings.compression_min_bytes:
+        return body, None
+
+    encodings = accepted_encodings(request)
+    if brotli is not None and "br" in encodings:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if "gzip" in encodings:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+
+def fast_json_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Serialize plain dicts/lists with orjson and compress the body when worthwhile."""
+
+    body, encoding = compress_body(request, orjson.dumps(content))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
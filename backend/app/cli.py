@@ -0,0 +1,374 @@
+"""Operational command line for the document store.
+
+Run from ``backend/``:
+
+    uv run python -m app.cli backfill-metadata [--status failed] [--limit 500]
+    uv run python -m app.cli reextract [--workers 8] [--dry-run]
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from pypdf import PdfReader
+from sqlalchemy import and_, or_
+
+from app.main import (
+    BASE_DIR,
+    EXTRACTION_VERSION,
+    METADATA_SYSTEM_PROMPT,
+    OcrPageORM,
+    SessionLocal,
+    TaxDocumentORM,
+    apply_extraction,
+    build_metadata_prompt,
+    collect_metadata_batch_job,
+    extract_document_metadata_with_llm,
+    extract_text_and_page_count,
+    metadata_batch_job_doc_ids,
+    metadata_batcher,
+    submit_metadata_batch_job,
+)
+from app.services.prompting import count_tokens
+from app.services.storage import StorageError, get_storage
+
+TERMINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+DEFAULT_CHECKPOINT_PATH = BASE_DIR / "reextract-checkpoint.jsonl"
+# Rough per-call token figures used by the dry-run cost estimate.
+METADATA_OUTPUT_TOKENS = 300
+OCR_PAGE_INPUT_TOKENS = 1800  # high-detail page image plus the OCR prompt
+OCR_PAGE_OUTPUT_TOKENS = 800
+OCR_REVIEW_PROMPT_TOKENS = 400
+
+
+def backfill_metadata(args: argparse.Namespace) -> int:
+    """Re-extract metadata for stored documents through the asynchronous Batch API.
+
+    Documents the batch could not handle are extracted one by one afterwards.
+    """
+
+    db = SessionLocal()
+    try:
+        if args.batch_id:
+            # Resume exactly the documents the batch was submitted for; the selection
+            # filters only apply when submitting.
+            batch_doc_ids = metadata_batch_job_doc_ids(args.batch_id)
+            query = db.query(TaxDocumentORM).filter(TaxDocumentORM.id.in_(batch_doc_ids))
+            docs = {doc.id: doc for doc in query}
+        else:
+            query = db.query(TaxDocumentORM).filter(TaxDocumentORM.full_text != "")
+            if args.status:
+                query = query.filter(TaxDocumentORM.status.in_(args.status))
+            if args.doc_id:
+                query = query.filter(TaxDocumentORM.id.in_(args.doc_id))
+            query = query.order_by(TaxDocumentORM.ingested_at).limit(args.limit)
+            docs = {doc.id: doc for doc in query}
+        if not docs:
+            print("No documents to backfill.")
+            return 0
+
+        batch_id = args.batch_id or submit_metadata_batch_job(
+            {doc_id: doc.full_text for doc_id, doc in docs.items()}
+        )
+        print(f"Batch {batch_id}: {len(docs)} document(s)")
+        if args.no_wait:
+            print(f"Resume with: python -m app.cli backfill-metadata --batch-id {batch_id}")
+            return 0
+
+        while True:
+            status, results = collect_metadata_batch_job(batch_id)
+            if status in TERMINAL_BATCH_STATUSES:
+                break
+            print(f"Batch {batch_id} is {status}; checking again in {args.poll_interval}s")
+            time.sleep(args.poll_interval)
+
+        failed = 0
+        for doc_id, doc in docs.items():
+            extraction = results.get(doc_id)
+            if extraction is None:
+                try:
+                    extraction = extract_document_metadata_with_llm(doc.full_text)
+                except Exception as exc:
+                    failed += 1
+                    print(f"{doc_id}: per-document fallback failed: {exc}")
+                    continue
+            apply_extraction(doc, extraction)
+            doc.status = "completed"
+            doc.error_message = None
+            db.commit()
+
+        print(
+            f"Batch {batch_id} {status}: {len(results)} from batch, "
+            f"{len(docs) - len(results) - failed} via fallback, {failed} failed"
+        )
+        return 1 if failed else 0
+    finally:
+        db.close()
+
+
+def stale_documents_query(db, include_failed: bool, retry_ids: Collection[str] = ()):
+    """Completed documents whose extraction was not produced by the current pipeline version.
+
+    Pending/processing documents are left to the API's background tasks. Failed documents
+    never get a version, so they are only selected with ``include_failed`` or when listed in
+    ``retry_ids`` (documents that failed earlier in a re-extraction run).
+    """
+
+    stale = and_(
+        TaxDocumentORM.status == "completed",
+        or_(
+            TaxDocumentORM.extraction_version.is_(None),
+            TaxDocumentORM.extraction_version != EXTRACTION_VERSION,
+        ),
+    )
+    if include_failed:
+        stale = or_(stale, TaxDocumentORM.status == "failed")
+    if retry_ids:
+        # Completed documents that failed re-extraction are still stale and already selected
+        stale = or_(
+            stale, and_(TaxDocumentORM.id.in_(retry_ids), TaxDocumentORM.status == "failed")
+        )
+    return db.query(TaxDocumentORM).filter(stale).order_by(TaxDocumentORM.ingested_at)
+
+
+class Checkpoint:
+    """Append-only JSONL record of documents handled by a re-extraction run."""
+
+    def __init__(self, path: Path, version: str) -> None:
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+
+    def load(self) -> dict[str, str]:
+        """Return ``{doc_id: outcome}`` for documents already handled at this version."""
+
+        handled: dict[str, str] = {}
+        if not self.path.exists():
+            return handled
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from an interrupted run
+            if record.get("version") == self.version:
+                handled[record["doc_id"]] = record["outcome"]
+        return handled
+
+    def record(self, doc_id: str, outcome: str, error: str | None = None) -> None:
+        line = json.dumps(
+            {"doc_id": doc_id, "version": self.version, "outcome": outcome, "error": error}
+        )
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+
+
+def estimate_reextraction(docs: list[TaxDocumentORM], args: argparse.Namespace) -> None:
+    """Print the token and dollar cost of re-extracting ``docs`` without calling any model."""
+
+    storage = get_storage()
+    input_tokens = output_tokens = calls = ocr_pages = missing = 0
+    for doc in docs:
+        try:
+            file_bytes = storage.for_location(doc.storage_path).read(doc.storage_path)
+        except StorageError:
+            missing += 1
+            continue
+
+        reader = PdfReader(io.BytesIO(file_bytes))
+        text = "\n".join(page.extract_text() or "" for page in reader.pages).strip()
+        if len(text) < 50:
+            # Image-based PDF: one vision call per page, then a review call over the OCR text.
+            pages = len(reader.pages)
+            ocr_pages += pages
+            calls += pages + 1
+            input_tokens += pages * OCR_PAGE_INPUT_TOKENS
+            output_tokens += pages * OCR_PAGE_OUTPUT_TOKENS
+            input_tokens += pages * OCR_PAGE_OUTPUT_TOKENS + OCR_REVIEW_PROMPT_TOKENS
+            output_tokens += pages * OCR_PAGE_OUTPUT_TOKENS
+            text = doc.full_text
+
+        calls += 1
+        input_tokens += count_tokens(METADATA_SYSTEM_PROMPT) + count_tokens(
+            build_metadata_prompt(text)
+        )
+        output_tokens += METADATA_OUTPUT_TOKENS
+
+    cost = (
+        input_tokens * args.input_price_per_mtok + output_tokens * args.output_price_per_mtok
+    ) / 1_000_000
+    print(f"Target extraction version: {EXTRACTION_VERSION}")
+    print(f"Documents: {len(docs)} ({missing} with missing files, {ocr_pages} OCR pages)")
+    print(f"Model calls: ~{calls} (metadata calls before batching)")
+    print(f"Tokens: ~{input_tokens:,} input, ~{output_tokens:,} output")
+    print(f"Estimated cost: ~${cost:,.2f}")
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def reextract_document(doc_id: str, storage_path: str) -> tuple[str, str | None]:
+    """Re-run text and metadata extraction for one stored document.
+
+    The row is only written once both steps succeeded; until then, and on failure, it keeps its
+    previous status, text and metadata, and the error is only recorded in the checkpoint.
+    """
+
+    try:
+        file_bytes = get_storage().for_location(storage_path).read(storage_path)
+        full_text, num_pages = extract_text_and_page_count(file_bytes, doc_id=doc_id)
+        extraction = metadata_batcher.extract(doc_id, full_text)
+    except Exception as exc:
+        return "failed", str(exc)[:500]
+
+    db = SessionLocal()
+    try:
+        doc = db.get(TaxDocumentORM, doc_id)
+        if doc is None:
+            return "failed", "Document was deleted during re-extraction"
+        apply_extraction(doc, extraction)
+        doc.extraction_version = EXTRACTION_VERSION
+        doc.full_text = full_text
+        doc.num_pages = num_pages
+        doc.status = "completed"
+        doc.error_message = None
+        db.query(OcrPageORM).filter(OcrPageORM.doc_id == doc_id).delete()
+        db.commit()
+        return "completed", None
+    finally:
+        db.close()
+
+
+def reextract(args: argparse.Namespace) -> int:
+    """Re-process stale documents from their stored PDFs in parallel, resumably."""
+
+    checkpoint = Checkpoint(Path(args.checkpoint), EXTRACTION_VERSION)
+    handled = checkpoint.load()
+
+    retry_ids = (
+        [doc_id for doc_id, outcome in handled.items() if outcome == "failed"]
+        if args.retry_failed
+        else []
+    )
+    db = SessionLocal()
+    try:
+        docs = stale_documents_query(db, args.include_failed, retry_ids).all()
+    finally:
+        db.close()
+
+    skipped_ids = {
+        doc_id
+        for doc_id, outcome in handled.items()
+        if outcome == "completed" or not args.retry_failed
+    }
+    todo = [doc for doc in docs if doc.id not in skipped_ids][: args.limit]
+
+    print(
+        f"{len(docs)} stale document(s) for {EXTRACTION_VERSION}; "
+        f"{len(docs) - len(todo)} skipped (checkpoint/limit), {len(todo)} to process"
+    )
+    if args.dry_run:
+        estimate_reextraction(todo, args)
+        return 0
+    if not todo:
+        return 0
+
+    started = time.monotonic()
+    done = failed = 0
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="reextract")
+    try:
+        futures = {
+            executor.submit(reextract_document, doc.id, doc.storage_path): doc.id for doc in todo
+        }
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                outcome, error = future.result()
+            except Exception as exc:
+                outcome, error = "failed", str(exc)
+            checkpoint.record(doc_id, outcome, error)
+
+            done += 1
+            failed += outcome != "completed"
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed else 0.0
+            eta = (len(todo) - done) / rate if rate else 0.0
+            line = (
+                f"[{done}/{len(todo)}] {doc_id} {outcome}  "
+                f"{rate * 60:.1f} docs/min  ETA {_format_duration(eta)}"
+            )
+            print(line + (f"  ({error})" if error else ""))
+    except KeyboardInterrupt:
+        executor.shutdown(wait=True, cancel_futures=True)
+        print(f"Interrupted after {done} document(s); rerun the same command to resume.")
+        return 130
+    executor.shutdown()
+
+    elapsed = time.monotonic() - started
+    print(
+        f"Re-extracted {done - failed} document(s), {failed} failed, "
+        f"in {_format_duration(elapsed)} ({done / elapsed * 60:.1f} docs/min)"
+    )
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="taxgpt", description="TaxGPT document store tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill-metadata",
+        help="Re-extract document metadata in bulk via the OpenAI Batch API.",
+    )
+    backfill.add_argument("--status", action="append", help="Only documents with this status.")
+    backfill.add_argument("--doc-id", action="append", help="Only this document (repeatable).")
+    backfill.add_argument("--limit", type=int, default=1000)
+    backfill.add_argument(
+        "--batch-id",
+        help="Collect an already submitted batch (its own documents; other filters are ignored).",
+    )
+    backfill.add_argument("--no-wait", action="store_true", help="Submit and exit.")
+    backfill.add_argument("--poll-interval", type=int, default=60, help="Seconds between polls.")
+    backfill.set_defaults(handler=backfill_metadata)
+
+    rerun = commands.add_parser(
+        "reextract",
+        help="Re-process documents extracted by an older pipeline version from their stored PDFs.",
+    )
+    rerun.add_argument("--workers", type=int, default=4, help="Documents processed in parallel.")
+    rerun.add_argument("--limit", type=int, default=None, help="Process at most this many.")
+    rerun.add_argument(
+        "--include-failed",
+        action="store_true",
+        help="Also re-process documents whose last extraction failed.",
+    )
+    rerun.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Also retry documents that failed earlier in this checkpoint, even if marked failed.",
+    )
+    rerun.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_PATH))
+    rerun.add_argument("--dry-run", action="store_true", help="Estimate cost and exit.")
+    rerun.add_argument("--input-price-per-mtok", type=float, default=0.25)
+    rerun.add_argument("--output-price-per-mtok", type=float, default=2.00)
+    rerun.set_defaults(handler=reextract)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -36,6 +36,119 @@ class Settings(BaseSettings):
         default="",
         description="OpenAI API key for document extraction.",
     )
+    metadata_prompt_token_budget: int = Field(
+        default=1500,
+        ge=256,
+        description="Maximum tokens of document text sent to the metadata extraction model.",
+    )
+    metadata_batch_max_size: int = Field(
+        default=10,
+        ge=1,
+        description="Documents grouped into one metadata extraction request (1 disables batching).",
+    )
+    metadata_batch_max_wait_ms: int = Field(
+        default=250,
+        ge=0,
+        description="How long the first queued document waits for others to join its batch.",
+    )
+    metadata_batch_max_concurrency: int = Field(
+        default=16,
+        ge=1,
+        description="Metadata extraction calls (batched or per-document fallback) run at once.",
+    )
+    ocr_page_max_attempts: int = Field(
+        default=3,
+        ge=1,
+        description="Vision calls per page before an image-based document is marked failed.",
+    )
+    ocr_page_retry_backoff_seconds: float = Field(
+        default=2.0,
+        ge=0,
+        description="Initial delay between page OCR attempts, doubled after each failure.",
+    )
+    admission_max_inflight_jobs: int = Field(
+        default=200,
+        ge=0,
+        description="Uploads queued or processing before ingestion answers 503 (0 = unlimited).",
+    )
+    admission_max_buffered_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        ge=0,
+        description="Upload bytes held for queued jobs before ingestion answers 503.",
+    )
+    admission_per_client_max_inflight: int = Field(
+        default=50,
+        ge=0,
+        description="Queued or processing uploads per API key/IP before answering 429.",
+    )
+    admission_per_client_uploads_per_minute: int = Field(
+        default=120,
+        ge=0,
+        description="Uploads accepted per API key/IP per minute before answering 429.",
+    )
+    admission_api_keys: str = Field(
+        default="",
+        description=(
+            "Comma-separated X-API-Key values that get their own admission quota; "
+            "any other caller is limited by IP address."
+        ),
+    )
+    fast_json_responses: bool = Field(
+        default=False,
+        description=(
+            "Serialize document list/text endpoints from projected rows with orjson and "
+            "compress large bodies, bypassing response_model validation."
+        ),
+    )
+    compression_min_bytes: int = Field(
+        default=1024,
+        ge=0,
+        description="Smallest fast-path response body worth compressing.",
+    )
+    mcp_batch_max_documents: int = Field(
+        default=100,
+        ge=1,
+        description="Most document ids one bulk MCP fetch may request.",
+    )
+    mcp_batch_max_text_chars: int = Field(
+        default=200_000,
+        ge=0,
+        description="Total full_text characters one bulk MCP fetch may return.",
+    )
+    mcp_aggregate_max_ids_per_group: int = Field(
+        default=200,
+        ge=0,
+        description="Most document ids listed per group by the MCP aggregate tool.",
+    )
+    storage_backend: Literal["local", "s3"] = Field(
+        default="local",
+        description="Where uploaded documents are stored.",
+    )
+    storage_local_root: str = Field(
+        default="",
+        description="Root directory of the local backend (defaults to app/uploads).",
+    )
+    storage_shard_depth: int = Field(
+        default=2,
+        ge=0,
+        le=4,
+        description="Levels of hashed subdirectories/key prefixes documents are spread over.",
+    )
+    storage_url_expiry_seconds: int = Field(
+        default=900,
+        description="Lifetime of presigned upload and download URLs.",
+    )
+    max_upload_bytes: int = Field(
+        default=50 * 1024 * 1024,
+        description="Largest document accepted through a presigned upload.",
+    )
+    s3_bucket: str = ""
+    s3_prefix: str = "documents"
+    s3_endpoint_url: str | None = Field(
+        default=None,
+        description="Custom endpoint for S3-compatible services such as MinIO.",
+    )
+    s3_region: str | None = None
 
     @field_validator("allow_origins", mode="before")
     @classmethod
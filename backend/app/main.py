@@ -1,30 +1,56 @@
 import base64
+import hashlib
+import hmac
 import io
+import json
 import os
+import time
 import uuid
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Generator, List, Literal, Optional
+from typing import Any, Generator, List, Literal, Optional, Union
 
-from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from mcp.server.fastmcp import FastMCP
 from openai import OpenAI
 from pdf2image import convert_from_bytes
 from pydantic import BaseModel, ConfigDict, Field
 from pypdf import PdfReader
-from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    create_engine,
+    func,
+    inspect,
+    text,
+)
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
+from app.api.responses import fast_json_response
 from app.core.config import settings
+from app.services.admission import AdmissionController, AdmissionRejectedError, AdmissionTicket
+from app.services.metadata_batching import MetadataBatcher
+from app.services.prompting import compact_document_text
+from app.services.storage import StorageError, get_storage
 
 # ---------- CONFIG ----------
 BASE_DIR = Path(__file__).resolve().parent
 DATABASE_PATH = BASE_DIR / "taxdocs.db"
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
-UPLOAD_DIR = BASE_DIR / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+METADATA_EXTRACTION_MODEL = "gpt-5-mini"
+OCR_MODEL = "gpt-5-mini"
+OCR_REVIEW_MODEL = "gpt-4o-mini"
+# Bump when text extraction or post-processing changes in a way that should trigger re-extraction.
+EXTRACTION_PIPELINE_VERSION = 2
 
 # ---------- DATABASE SETUP ----------
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
@@ -47,11 +73,46 @@ class TaxDocumentORM(Base):
     full_text = Column(Text, nullable=False, default="")
     status = Column(String, nullable=False, default="pending")  # pending, processing, completed, failed
     error_message = Column(Text, nullable=True)
+    extraction_version = Column(String, nullable=True, index=True)
+
+
+class OcrPageORM(Base):
+    """OCR result for one page of an image-based PDF, saved as soon as the page completes."""
+
+    __tablename__ = "ocr_pages"
+    __table_args__ = (UniqueConstraint("doc_id", "page_number", name="uq_ocr_pages_doc_page"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_id = Column(String, nullable=False, index=True)
+    content_sha256 = Column(String, nullable=False)  # pages are reused only for identical bytes
+    page_number = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False, default="")
+    confidence = Column(Float, nullable=True)
+    model = Column(String, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 Base.metadata.create_all(bind=engine)
 
 
+def add_missing_columns() -> None:
+    """Add columns introduced after the database file was created (there are no migrations yet)."""
+
+    existing = {column["name"] for column in inspect(engine).get_columns(TaxDocumentORM.__tablename__)}
+    with engine.begin() as connection:
+        for column in TaxDocumentORM.__table__.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE {TaxDocumentORM.__tablename__} ADD COLUMN {column.name} {column_type}")
+                )
+
+
+add_missing_columns()
+
+
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
@@ -72,10 +133,33 @@ class TaxDocumentMetadata(BaseModel):
     ingested_at: datetime
     status: str = "pending"  # pending, processing, completed, failed
     error_message: Optional[str] = None
+    extraction_version: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Columns backing TaxDocumentMetadata, for queries that skip loading full_text
+METADATA_COLUMNS = [getattr(TaxDocumentORM, name) for name in TaxDocumentMetadata.model_fields]
+
+
+class UploadPolicyRequest(BaseModel):
+    filename: str
+    content_type: Literal["application/pdf"] = "application/pdf"
+    size_bytes: Optional[int] = Field(None, ge=1)
+
+
+class UploadPolicyResponse(BaseModel):
+    doc_id: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+
+
+class RegisterDocumentRequest(BaseModel):
+    doc_id: str
+    filename: str
+
+
 class TaxDocumentTextResponse(BaseModel):
     id: str
     full_text: str
@@ -83,6 +167,29 @@ class TaxDocumentTextResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Fields the bulk MCP fetch can select, and the columns the MCP aggregate tool can group by
+TAX_DOCUMENT_FIELDS = [*TaxDocumentMetadata.model_fields, "full_text"]
+TaxDocumentGroupField = Literal["tax_year", "doc_type", "status", "payer_name"]
+
+
+class TaxDocumentBatchResponse(BaseModel):
+    documents: List[dict[str, Any]]
+    missing_ids: List[str] = Field(default_factory=list)
+    truncated_ids: List[str] = Field(default_factory=list)
+
+
+class TaxDocumentGroup(BaseModel):
+    key: dict[str, Union[int, str, None]]
+    count: int
+    doc_ids: List[str] = Field(default_factory=list)
+
+
+class TaxDocumentAggregateResponse(BaseModel):
+    group_by: List[str]
+    total: int
+    groups: List[TaxDocumentGroup]
+
+
 # ---------- LLM EXTRACTION MODELS ----------
 class TaxDocumentExtraction(BaseModel):
     """Structured extraction of tax document metadata using LLM."""
@@ -152,8 +259,12 @@ class TaxDocumentExtraction(BaseModel):
 
 
 # ---------- PDF UTILITIES ----------
-def extract_text_and_page_count(file_bytes: bytes) -> tuple[str, int]:
-    """Extract raw text and page count from a PDF. Uses image extraction if text is empty."""
+def extract_text_and_page_count(file_bytes: bytes, doc_id: Optional[str] = None) -> tuple[str, int]:
+    """Extract raw text and page count from a PDF. Uses image extraction if text is empty.
+
+    With a ``doc_id`` the per-page OCR results are checkpointed, so a failed document resumes
+    from its first missing page when processed again.
+    """
 
     reader = PdfReader(io.BytesIO(file_bytes))
     num_pages = len(reader.pages)
@@ -165,14 +276,10 @@ def extract_text_and_page_count(file_bytes: bytes) -> tuple[str, int]:
 
     full_text = "\n".join(full_text_parts).strip()
 
-    # If extracted text is empty or very minimal (likely image-based PDF), use LLM vision extraction
+    # If extracted text is empty or very minimal (likely image-based PDF), use LLM vision extraction.
+    # OCR failures propagate so the document is marked failed and can be retried (and resumed).
     if not full_text or len(full_text) < 50:
-        try:
-            full_text = extract_text_from_pdf_images(file_bytes, num_pages)
-        except Exception as exc:
-            # If image extraction fails, log but don't fail completely
-            # Return minimal text with error note
-            full_text = f"[Image-based PDF - OCR extraction failed: {str(exc)}]"
+        full_text = extract_text_from_pdf_images(file_bytes, num_pages, doc_id=doc_id)
 
     return full_text, num_pages
 
@@ -198,40 +305,11 @@ class ImageTextExtraction(BaseModel):
 
 
 # ---------- IMAGE TEXT EXTRACTION ----------
-def extract_text_from_pdf_images(
-    file_bytes: bytes,
-    num_pages: int,
-) -> str:
-    """Extract text from image-based PDF using LLM vision API with structured outputs."""
+OCR_SYSTEM_PROMPT = "You are a precise OCR system specialized in extracting text from tax documents. Extract all visible text accurately and completely."
 
-    api_key = settings.openai_api_key or os.getenv("OPENAI_API_KEY", "")
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY not configured. Set TAXGPT_OPENAI_API_KEY or OPENAI_API_KEY environment variable.",
-        )
 
-    client = OpenAI(api_key=api_key)
-
-    # Convert PDF pages to images
-    try:
-        images = convert_from_bytes(file_bytes, dpi=300, first_page=1, last_page=num_pages)
-    except Exception as exc:
-        raise ValueError(f"Failed to convert PDF to images: {str(exc)}") from exc
-
-    if not images:
-        raise ValueError("No images extracted from PDF")
-
-    # Process each page and combine text
-    all_extracted_text = []
-    total_confidence = 0.0
-
-    for page_num, image in enumerate(images, start=1):
-        # Convert image to base64
-        buffered = io.BytesIO()
-        image.save(buffered, format="PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        prompt = f"""<task>
+def build_ocr_page_prompt(page_num: int, num_pages: int) -> str:
+    return f"""<task>
 You are an expert OCR and tax document text extraction system. Extract ALL visible text from this tax document image with maximum accuracy.
 
 <image_context>
@@ -265,37 +343,136 @@ Return a structured object with the extracted text, confidence score, and any re
 </output_format>
 </task>"""
 
-        try:
-            # Use chat completions with vision for image processing
-            response = client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a precise OCR system specialized in extracting text from tax documents. Extract all visible text accurately and completely.",
-                    },
+
+def ocr_page_image(client: OpenAI, image, page_num: int, num_pages: int) -> ImageTextExtraction:
+    """Run the vision model over one rendered page."""
+
+    buffered = io.BytesIO()
+    image.save(buffered, format="PNG")
+    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    response = client.responses.parse(
+        model=OCR_MODEL,
+        input=[
+            {"role": "system", "content": OCR_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_text", "text": build_ocr_page_prompt(page_num, num_pages)},
                     {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{img_base64}",
-                                    "detail": "high",  # High detail for better OCR
-                                },
-                            },
-                        ],
+                        "type": "input_image",
+                        "image_url": f"data:image/png;base64,{img_base64}",
+                        "detail": "high",  # High detail for better OCR
                     },
                 ],
-                max_completion_tokens=10000,  # Enough tokens for full text extraction
+            },
+        ],
+        text_format=ImageTextExtraction,
+        max_output_tokens=10000,  # Enough tokens for full text extraction
+    )
+    raise_for_unusable_response(response)
+
+    extraction = response.output_parsed
+    if not isinstance(extraction, ImageTextExtraction):
+        raise ValueError("OCR model returned invalid extraction format")
+    return extraction
+
+
+def load_ocr_checkpoint(doc_id: str, content_sha256: str) -> dict[int, str]:
+    """Return saved page texts for this exact file and OCR model, dropping stale pages."""
+
+    db = SessionLocal()
+    try:
+        pages = db.query(OcrPageORM).filter(OcrPageORM.doc_id == doc_id).all()
+        saved: dict[int, str] = {}
+        for page in pages:
+            if page.content_sha256 == content_sha256 and page.model == OCR_MODEL:
+                saved[page.page_number] = page.text
+            else:
+                db.delete(page)
+        db.commit()
+        return saved
+    finally:
+        db.close()
+
+
+def save_ocr_page(
+    doc_id: str,
+    content_sha256: str,
+    page_num: int,
+    extraction: ImageTextExtraction,
+    duration_ms: int,
+    attempts: int,
+) -> None:
+    db = SessionLocal()
+    try:
+        db.add(
+            OcrPageORM(
+                doc_id=doc_id,
+                content_sha256=content_sha256,
+                page_number=page_num,
+                text=extraction.extracted_text,
+                confidence=extraction.confidence,
+                model=OCR_MODEL,
+                duration_ms=duration_ms,
+                attempts=attempts,
             )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def extract_text_from_pdf_images(
+    file_bytes: bytes,
+    num_pages: int,
+    doc_id: Optional[str] = None,
+) -> str:
+    """Extract text from image-based PDF using LLM vision API with structured outputs.
+
+    Each page is retried up to ``TAXGPT_OCR_PAGE_MAX_ATTEMPTS`` times. When ``doc_id`` is given,
+    finished pages are saved to ``ocr_pages`` and skipped on the next run.
+    """
+
+    client = get_openai_client()
+
+    content_sha256 = hashlib.sha256(file_bytes).hexdigest()
+    saved_pages = load_ocr_checkpoint(doc_id, content_sha256) if doc_id else {}
 
-            page_text = response.choices[0].message.content or ""
-            all_extracted_text.append(f"--- Page {page_num} ---\n{page_text}")
+    # Process each page and combine text
+    all_extracted_text = []
+
+    for page_num in range(1, num_pages + 1):
+        if page_num in saved_pages:
+            all_extracted_text.append(f"--- Page {page_num} ---\n{saved_pages[page_num]}")
+            continue
 
+        # Render only this page; resumed runs never rasterize pages that are already done
+        try:
+            images = convert_from_bytes(file_bytes, dpi=300, first_page=page_num, last_page=page_num)
         except Exception as exc:
-            raise ValueError(f"Failed to extract text from page {page_num}: {str(exc)}") from exc
+            raise ValueError(f"Failed to convert PDF to images: {str(exc)}") from exc
+        if not images:
+            raise ValueError(f"No image extracted from PDF page {page_num}")
+
+        max_attempts = settings.ocr_page_max_attempts
+        for attempt in range(1, max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                extraction = ocr_page_image(client, images[0], page_num, num_pages)
+                break
+            except Exception as exc:
+                if attempt == max_attempts:
+                    raise ValueError(
+                        f"Failed to extract text from page {page_num} of {num_pages} after "
+                        f"{max_attempts} attempts: {str(exc)}"
+                    ) from exc
+                time.sleep(settings.ocr_page_retry_backoff_seconds * 2 ** (attempt - 1))
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        if doc_id:
+            save_ocr_page(doc_id, content_sha256, page_num, extraction, duration_ms, attempt)
+        all_extracted_text.append(f"--- Page {page_num} ---\n{extraction.extracted_text}")
 
     # Combine all pages
     combined_text = "\n\n".join(all_extracted_text)
@@ -303,7 +480,7 @@ Return a structured object with the extracted text, confidence score, and any re
     # Use structured outputs to get final extraction with confidence
     try:
         structured_response = client.responses.parse(
-            model="gpt-4o-mini",
+            model=OCR_REVIEW_MODEL,
             input=[
                 {
                     "role": "system",
@@ -345,34 +522,60 @@ Review the following OCR-extracted text from a tax document and provide a struct
 
 
 # ---------- LLM EXTRACTION ----------
-def extract_document_metadata_with_llm(text: str) -> TaxDocumentExtraction:
-    """Extract comprehensive tax document metadata using OpenAI Responses API with structured outputs."""
+METADATA_SYSTEM_PROMPT = "You are a precise tax document extraction system. Always return valid structured data matching the provided schema."
+
+METADATA_INSTRUCTIONS = """1. Identify the specific tax form type (W-2, 1099 variants, 1098, etc.)
+2. Extract the tax year from form headers, dates, or context clues
+3. Extract payer/employer name (full legal or business name)
+4. Extract taxpayer/recipient/employee name (full name as shown)
+5. Extract SSN/TIN and EIN if present and clearly visible
+6. Assess your confidence in the extraction (0.0-1.0)
+7. Note any ambiguities or missing information
+
+Long documents are condensed: repeated page headers are shown once and "[...]" marks omitted lines.
+
+Be precise and conservative. Only extract information you are confident about. If a field cannot be reliably determined, set it to None."""
+
+
+class KeyedTaxDocumentExtraction(TaxDocumentExtraction):
+    """Metadata extraction for one document of a batched request."""
 
+    doc_id: str = Field(
+        description="The id attribute of the <document> element this extraction belongs to.",
+    )
+
+
+class TaxDocumentBatchExtraction(BaseModel):
+    """Structured extraction of metadata for several tax documents in one request."""
+
+    documents: List[KeyedTaxDocumentExtraction] = Field(
+        description="Exactly one extraction per input document, identified by its doc_id.",
+    )
+
+
+def get_openai_client() -> OpenAI:
     api_key = settings.openai_api_key or os.getenv("OPENAI_API_KEY", "")
     if not api_key:
         raise ValueError(
             "OPENAI_API_KEY not configured. Set TAXGPT_OPENAI_API_KEY or OPENAI_API_KEY environment variable.",
         )
+    return OpenAI(api_key=api_key)
+
 
-    client = OpenAI(api_key=api_key)
+def build_metadata_prompt(text: str) -> str:
+    """Build the single-document metadata extraction prompt."""
 
-    prompt = f"""<task>
+    document_text = compact_document_text(text, settings.metadata_prompt_token_budget).text
+
+    return f"""<task>
 You are an expert tax document analyst. Analyze the following extracted text from a tax document PDF and extract all relevant metadata with high accuracy.
 
 <document_text>
-{text[:15000]}  <!-- Truncated to 15k chars if longer -->
+{document_text}
 </document_text>
 
 <instructions>
-1. Identify the specific tax form type (W-2, 1099 variants, 1098, etc.)
-2. Extract the tax year from form headers, dates, or context clues
-3. Extract payer/employer name (full legal or business name)
-4. Extract taxpayer/recipient/employee name (full name as shown)
-5. Extract SSN/TIN and EIN if present and clearly visible
-6. Assess your confidence in the extraction (0.0-1.0)
-7. Note any ambiguities or missing information
-
-Be precise and conservative. Only extract information you are confident about. If a field cannot be reliably determined, set it to None.
+{METADATA_INSTRUCTIONS}
 </instructions>
 
 <output_format>
@@ -380,33 +583,70 @@ Return a structured JSON object matching the TaxDocumentExtraction schema with a
 </output_format>
 </task>"""
 
+
+def build_batch_metadata_prompt(texts: dict[str, str]) -> str:
+    """Build one prompt covering several documents, each tagged with its doc id."""
+
+    documents = "\n\n".join(
+        f'<document id="{doc_id}">\n'
+        f"{compact_document_text(text, settings.metadata_prompt_token_budget).text}\n"
+        "</document>"
+        for doc_id, text in texts.items()
+    )
+
+    return f"""<task>
+You are an expert tax document analyst. Each <document> below is the extracted text of a separate tax document PDF. Extract the metadata of every document independently; never mix information between documents.
+
+<documents>
+{documents}
+</documents>
+
+<instructions>
+{METADATA_INSTRUCTIONS}
+</instructions>
+
+<output_format>
+Return a structured JSON object matching the TaxDocumentBatchExtraction schema with exactly one entry per document, setting doc_id to the document's id attribute.
+</output_format>
+</task>"""
+
+
+def raise_for_unusable_response(response) -> None:
+    """Raise ValueError if a Responses API result is incomplete or was refused."""
+
+    # Check for incomplete responses
+    if hasattr(response, "status") and response.status == "incomplete":
+        incomplete_details = getattr(response, "incomplete_details", None)
+        reason = getattr(incomplete_details, "reason", "unknown") if incomplete_details else "unknown"
+        raise ValueError(f"Incomplete response from model: {reason}")
+
+    # Check for refusals in output
+    if hasattr(response, "output") and response.output:
+        for output_item in response.output:
+            if hasattr(output_item, "content") and output_item.content:
+                for content_item in output_item.content:
+                    if hasattr(content_item, "type") and content_item.type == "refusal":
+                        refusal_msg = getattr(content_item, "refusal", "Unknown reason")
+                        raise ValueError(f"Model refused to process the document: {refusal_msg}")
+
+
+def extract_document_metadata_with_llm(text: str) -> TaxDocumentExtraction:
+    """Extract comprehensive tax document metadata using OpenAI Responses API with structured outputs."""
+
+    client = get_openai_client()
+    prompt = build_metadata_prompt(text)
+
     try:
         response = client.responses.parse(
-            model="gpt-5-mini",
+            model=METADATA_EXTRACTION_MODEL,
             input=[
-                {
-                    "role": "system",
-                    "content": "You are a precise tax document extraction system. Always return valid structured data matching the provided schema.",
-                },
+                {"role": "system", "content": METADATA_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             text_format=TaxDocumentExtraction,
         )
 
-        # Check for incomplete responses
-        if hasattr(response, "status") and response.status == "incomplete":
-            incomplete_details = getattr(response, "incomplete_details", None)
-            reason = getattr(incomplete_details, "reason", "unknown") if incomplete_details else "unknown"
-            raise ValueError(f"Incomplete response from model: {reason}")
-
-        # Check for refusals in output
-        if hasattr(response, "output") and response.output:
-            for output_item in response.output:
-                if hasattr(output_item, "content") and output_item.content:
-                    for content_item in output_item.content:
-                        if hasattr(content_item, "type") and content_item.type == "refusal":
-                            refusal_msg = getattr(content_item, "refusal", "Unknown reason")
-                            raise ValueError(f"Model refused to process the document: {refusal_msg}")
+        raise_for_unusable_response(response)
 
         # Get parsed output
         extraction = response.output_parsed
@@ -432,6 +672,209 @@ Return a structured JSON object matching the TaxDocumentExtraction schema with a
         ) from exc
 
 
+def extract_documents_metadata_batch_with_llm(
+    texts: dict[str, str],
+) -> dict[str, TaxDocumentExtraction]:
+    """Extract metadata for several documents in one structured-output request.
+
+    Returns extractions keyed by doc id. Documents the model skipped are simply absent, so
+    callers can fall back to per-document extraction for them.
+    """
+
+    client = get_openai_client()
+    response = client.responses.parse(
+        model=METADATA_EXTRACTION_MODEL,
+        input=[
+            {"role": "system", "content": METADATA_SYSTEM_PROMPT},
+            {"role": "user", "content": build_batch_metadata_prompt(texts)},
+        ],
+        text_format=TaxDocumentBatchExtraction,
+    )
+
+    raise_for_unusable_response(response)
+
+    batch = response.output_parsed
+    if not isinstance(batch, TaxDocumentBatchExtraction):
+        raise ValueError("LLM returned invalid batch extraction format")
+
+    doc_ids = [item.doc_id for item in batch.documents]
+    duplicates = sorted({doc_id for doc_id in doc_ids if doc_ids.count(doc_id) > 1})
+    if duplicates:
+        raise ValueError(f"LLM returned more than one extraction for: {', '.join(duplicates)}")
+
+    return {
+        item.doc_id: TaxDocumentExtraction.model_validate(item.model_dump(exclude={"doc_id"}))
+        for item in batch.documents
+        if item.doc_id in texts
+    }
+
+
+metadata_batcher: MetadataBatcher[TaxDocumentExtraction] = MetadataBatcher(
+    extract_batch=extract_documents_metadata_batch_with_llm,
+    extract_one=extract_document_metadata_with_llm,
+    max_batch_size=settings.metadata_batch_max_size,
+    max_wait_ms=settings.metadata_batch_max_wait_ms,
+    max_concurrency=settings.metadata_batch_max_concurrency,
+)
+
+
+# ---------- EXTRACTION VERSIONING ----------
+def compute_extraction_version() -> str:
+    """Fingerprint of everything that shapes an extraction: pipeline, prompts, schema and models."""
+
+    fingerprint = {
+        "pipeline": EXTRACTION_PIPELINE_VERSION,
+        "models": [METADATA_EXTRACTION_MODEL, OCR_MODEL, OCR_REVIEW_MODEL],
+        "system_prompt": METADATA_SYSTEM_PROMPT,
+        "ocr_prompt": [OCR_SYSTEM_PROMPT, build_ocr_page_prompt(1, 1)],
+        "prompt": build_metadata_prompt(""),
+        "batch_prompt": build_batch_metadata_prompt({"": ""}),
+        "schema": TaxDocumentExtraction.model_json_schema(),
+        "token_budget": settings.metadata_prompt_token_budget,
+    }
+    digest = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"v{EXTRACTION_PIPELINE_VERSION}-{digest[:12]}"
+
+
+EXTRACTION_VERSION = compute_extraction_version()
+
+
+# ---------- OFFLINE BULK EXTRACTION (OpenAI Batch API) ----------
+def strict_json_schema(model: type[BaseModel]) -> dict:
+    """JSON schema of ``model`` in the form strict structured outputs require.
+
+    Every object forbids additional properties and lists all of its properties as required
+    (optional fields stay nullable), and ``null`` defaults are dropped.
+    """
+
+    def tighten(node) -> None:
+        if isinstance(node, dict):
+            if node.get("type") == "object" and "properties" in node:
+                node["additionalProperties"] = False
+                node["required"] = list(node["properties"])
+            if "default" in node and node["default"] is None:
+                del node["default"]
+            for value in node.values():
+                tighten(value)
+        elif isinstance(node, list):
+            for item in node:
+                tighten(item)
+
+    schema = model.model_json_schema()
+    tighten(schema)
+    return schema
+
+
+def build_metadata_batch_api_requests(texts: dict[str, str]) -> list[dict]:
+    """Build Batch API request lines (one /v1/responses call per document)."""
+
+    text_format = {
+        "format": {
+            "type": "json_schema",
+            "name": "TaxDocumentExtraction",
+            "schema": strict_json_schema(TaxDocumentExtraction),
+            "strict": True,
+        }
+    }
+    return [
+        {
+            "custom_id": doc_id,
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {
+                "model": METADATA_EXTRACTION_MODEL,
+                "input": [
+                    {"role": "system", "content": METADATA_SYSTEM_PROMPT},
+                    {"role": "user", "content": build_metadata_prompt(text)},
+                ],
+                "text": text_format,
+            },
+        }
+        for doc_id, text in texts.items()
+    ]
+
+
+def submit_metadata_batch_job(texts: dict[str, str]) -> str:
+    """Upload a metadata extraction batch to the OpenAI Batch API and return the batch id."""
+
+    client = get_openai_client()
+    payload = "\n".join(json.dumps(line) for line in build_metadata_batch_api_requests(texts))
+    batch_file = client.files.create(
+        file=("metadata-extraction.jsonl", payload.encode("utf-8")),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
+        metadata={"job": "tax-document-metadata"},
+    )
+    return batch.id
+
+
+def parse_metadata_batch_output(output_jsonl: str) -> dict[str, TaxDocumentExtraction]:
+    """Parse a Batch API output file into extractions keyed by doc id, skipping failed lines."""
+
+    results: dict[str, TaxDocumentExtraction] = {}
+    for line in output_jsonl.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            continue
+        body = response.get("body") or {}
+        if body.get("status") not in (None, "completed"):
+            continue
+        for output_item in body.get("output", []):
+            for content_item in output_item.get("content") or []:
+                if content_item.get("type") != "output_text":
+                    continue
+                try:
+                    results[record["custom_id"]] = TaxDocumentExtraction.model_validate_json(
+                        content_item["text"]
+                    )
+                except ValueError:
+                    pass
+    return results
+
+
+def metadata_batch_job_doc_ids(batch_id: str) -> list[str]:
+    """Doc ids a submitted batch covers, read from the custom_ids of its input file."""
+
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    input_jsonl = client.files.content(batch.input_file_id).text
+    return [json.loads(line)["custom_id"] for line in input_jsonl.splitlines() if line.strip()]
+
+
+def collect_metadata_batch_job(batch_id: str) -> tuple[str, dict[str, TaxDocumentExtraction]]:
+    """Return the batch status and, once it has finished, the parsed extractions."""
+
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in ("completed", "failed", "expired", "cancelled"):
+        return batch.status, {}
+    if not batch.output_file_id:
+        return batch.status, {}
+
+    output = client.files.content(batch.output_file_id).text
+    return batch.status, parse_metadata_batch_output(output)
+
+
+def apply_extraction(db_doc: TaxDocumentORM, extraction: TaxDocumentExtraction) -> None:
+    """Copy extracted metadata onto a row.
+
+    Does not touch ``extraction_version``: only callers that also produced ``full_text`` with the
+    current pipeline may stamp it, otherwise re-extraction would skip stale text.
+    """
+
+    db_doc.doc_type = extraction.doc_type
+    db_doc.tax_year = extraction.tax_year
+    db_doc.payer_name = extraction.payer_name
+    db_doc.taxpayer_name = extraction.taxpayer_name
+
+
 # ---------- FASTAPI APP ----------
 app = FastAPI(title="Tax Document Ingestion + MCP Server")
 
@@ -458,18 +901,22 @@ def process_document_async(doc_id: str, file_bytes: bytes, original_filename: st
 
         try:
             # Extract text and page count
-            full_text, num_pages = extract_text_and_page_count(file_bytes)
+            full_text, num_pages = extract_text_and_page_count(file_bytes, doc_id=doc_id)
 
-            # Extract metadata using LLM with structured outputs
-            extraction = extract_document_metadata_with_llm(full_text)
-
-            # Update document with extracted data
-            db_doc.doc_type = extraction.doc_type
-            db_doc.tax_year = extraction.tax_year
-            db_doc.payer_name = extraction.payer_name
-            db_doc.taxpayer_name = extraction.taxpayer_name
+            # Keep the text even if metadata extraction fails, so backfill-metadata can retry
+            # it; full_text now holds every page, so the OCR checkpoint is no longer needed
             db_doc.num_pages = num_pages
             db_doc.full_text = full_text
+            db.query(OcrPageORM).filter(OcrPageORM.doc_id == doc_id).delete()
+            db.commit()
+
+            # Extract metadata using LLM with structured outputs, batched with other
+            # documents finishing text extraction at the same time
+            extraction = metadata_batcher.extract(doc_id, full_text)
+
+            # Update document with extracted data
+            apply_extraction(db_doc, extraction)
+            db_doc.extraction_version = EXTRACTION_VERSION
             db_doc.status = "completed"
             db_doc.error_message = None
 
@@ -485,12 +932,74 @@ def process_document_async(doc_id: str, file_bytes: bytes, original_filename: st
         db.close()
 
 
+# ---------- ADMISSION CONTROL ----------
+admission = AdmissionController(
+    max_inflight_jobs=settings.admission_max_inflight_jobs,
+    max_buffered_bytes=settings.admission_max_buffered_bytes,
+    per_client_max_inflight=settings.admission_per_client_max_inflight,
+    per_client_uploads_per_minute=settings.admission_per_client_uploads_per_minute,
+)
+
+
+def admission_client_id(request: Request) -> str:
+    """Identify the caller by a configured API key, otherwise by IP address.
+
+    Keys are not authenticated anywhere else, so an unknown key must not buy a fresh quota.
+    """
+    api_key = request.headers.get("x-api-key", "").encode("utf-8")
+    known_keys = [key.strip() for key in settings.admission_api_keys.split(",") if key.strip()]
+    if api_key and any(hmac.compare_digest(api_key, key.encode("utf-8")) for key in known_keys):
+        return "key:" + hashlib.sha256(api_key).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def admit_upload(request: Request, size_bytes: int) -> AdmissionTicket:
+    try:
+        return admission.admit(admission_client_id(request), size_bytes)
+    except AdmissionRejectedError as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail,
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
+def run_admitted(ticket: AdmissionTicket, task, *args) -> None:
+    """Run a background task and hand its admission capacity back when it ends."""
+    try:
+        task(*args)
+    finally:
+        admission.release(ticket)
+
+
+def process_stored_document(doc_id: str) -> None:
+    """Background task for documents uploaded straight to storage."""
+    db = SessionLocal()
+    try:
+        db_doc = db.get(TaxDocumentORM, doc_id)
+        if not db_doc:
+            return
+        original_filename = db_doc.original_filename
+        try:
+            file_bytes = get_storage().for_location(db_doc.storage_path).read(db_doc.storage_path)
+        except StorageError as exc:
+            db_doc.status = "failed"
+            db_doc.error_message = str(exc)[:500]
+            db.commit()
+            return
+    finally:
+        db.close()
+
+    process_document_async(doc_id, file_bytes, original_filename)
+
+
 @app.post(
     "/api/documents/ingest",
     response_model=TaxDocumentMetadata,
     summary="Ingest a new tax document PDF",
 )
 async def ingest_document(
+    request: Request,
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(get_db),
@@ -498,30 +1007,117 @@ async def ingest_document(
     if file.content_type not in ("application/pdf", "application/octet-stream"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    file_bytes = await file.read()
+    # Reserve queue capacity before pulling the spooled upload into memory
+    ticket = admit_upload(request, file.size or 0)
+    try:
+        file_bytes = await file.read()
 
-    # Create document record immediately with pending status
-    doc_id = str(uuid.uuid4())
-    storage_path = UPLOAD_DIR / f"{doc_id}.pdf"
-    with storage_path.open("wb") as f:
-        f.write(file_bytes)
+        # Create document record immediately with pending status
+        doc_id = str(uuid.uuid4())
+        storage_path = await run_in_threadpool(get_storage().save, f"{doc_id}.pdf", file_bytes)
+    except BaseException:
+        admission.release(ticket)
+        raise
 
     # Create document with pending status
     db_doc = TaxDocumentORM(
         id=doc_id,
         original_filename=file.filename or f"{doc_id}.pdf",
-        storage_path=str(storage_path),
+        storage_path=storage_path,
         doc_type="unknown",
         num_pages=0,
         full_text="",
         status="pending",
     )
-    db.add(db_doc)
-    db.commit()
-    db.refresh(db_doc)
+    try:
+        db.add(db_doc)
+        db.commit()
+        db.refresh(db_doc)
+    except BaseException:
+        admission.release(ticket)
+        raise
 
     # Queue background task for processing
-    background_tasks.add_task(process_document_async, doc_id, file_bytes, file.filename or "")
+    background_tasks.add_task(
+        run_admitted, ticket, process_document_async, doc_id, file_bytes, file.filename or ""
+    )
+
+    return db_doc
+
+
+@app.post(
+    f"{settings.api_prefix}/uploads/policy",
+    response_model=UploadPolicyResponse,
+    summary="Get a presigned policy for uploading a PDF straight to storage",
+)
+def create_upload_policy(request: UploadPolicyRequest) -> UploadPolicyResponse:
+    """Issue a presigned POST; follow the upload with ``POST /api/v1/documents``."""
+    storage = get_storage()
+    if not storage.supports_direct_upload:
+        raise HTTPException(
+            status_code=501,
+            detail="Direct uploads require the s3 storage backend; use /api/documents/ingest.",
+        )
+    if request.size_bytes is not None and request.size_bytes > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail="File exceeds the maximum upload size.")
+
+    doc_id = str(uuid.uuid4())
+    upload = storage.presigned_upload(
+        f"{doc_id}.pdf",
+        content_type=request.content_type,
+        max_bytes=settings.max_upload_bytes,
+    )
+    return UploadPolicyResponse(
+        doc_id=doc_id,
+        url=upload.url,
+        fields=upload.fields,
+        expires_in=upload.expires_in,
+    )
+
+
+@app.post(
+    f"{settings.api_prefix}/documents",
+    response_model=TaxDocumentMetadata,
+    summary="Register a PDF uploaded with a presigned policy and start processing",
+)
+def register_document(
+    request: RegisterDocumentRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> TaxDocumentMetadata:
+    try:
+        doc_id = str(uuid.UUID(request.doc_id))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid document id.") from exc
+    if db.get(TaxDocumentORM, doc_id):
+        raise HTTPException(status_code=409, detail="Document already registered.")
+
+    storage = get_storage()
+    storage_path = storage.location_for(f"{doc_id}.pdf")
+    if not storage.exists(storage_path):
+        raise HTTPException(status_code=404, detail="No uploaded file found for this document.")
+
+    # The bytes live in object storage until processing starts, so only the job counts
+    ticket = admit_upload(http_request, 0)
+    db_doc = TaxDocumentORM(
+        id=doc_id,
+        original_filename=request.filename,
+        storage_path=storage_path,
+        doc_type="unknown",
+        num_pages=0,
+        full_text="",
+        status="pending",
+    )
+    try:
+        db.add(db_doc)
+        db.commit()
+        db.refresh(db_doc)
+    except BaseException:
+        admission.release(ticket)
+        raise
+
+    background_tasks.add_task(run_admitted, ticket, process_stored_document, doc_id)
 
     return db_doc
 
@@ -532,17 +1128,24 @@ async def ingest_document(
     summary="List ingested tax documents",
 )
 def list_documents(
+    request: Request,
     tax_year: Optional[int] = None,
     doc_type: Optional[str] = None,
     db: Session = Depends(get_db),
 ) -> List[TaxDocumentMetadata]:
-    query = db.query(TaxDocumentORM)
+    if settings.fast_json_responses:
+        # Project only the metadata columns (never full_text) and serialize the rows directly
+        query = db.query(*METADATA_COLUMNS)
+    else:
+        query = db.query(TaxDocumentORM)
     if tax_year is not None:
         query = query.filter(TaxDocumentORM.tax_year == tax_year)
     if doc_type is not None:
         query = query.filter(TaxDocumentORM.doc_type == doc_type)
 
     docs = query.order_by(TaxDocumentORM.ingested_at.desc()).all()
+    if settings.fast_json_responses:
+        return fast_json_response(request, [row._asdict() for row in docs])
     return docs
 
 
@@ -564,7 +1167,21 @@ def get_document_metadata(doc_id: str, db: Session = Depends(get_db)) -> TaxDocu
     response_model=TaxDocumentTextResponse,
     summary="Get full extracted text for a document",
 )
-def get_document_text(doc_id: str, db: Session = Depends(get_db)) -> TaxDocumentTextResponse:
+def get_document_text(
+    doc_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+) -> TaxDocumentTextResponse:
+    if settings.fast_json_responses:
+        row = (
+            db.query(TaxDocumentORM.id, TaxDocumentORM.full_text)
+            .filter(TaxDocumentORM.id == doc_id)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return fast_json_response(request, row._asdict())
+
     doc = db.get(TaxDocumentORM, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -576,14 +1193,20 @@ def get_document_text(doc_id: str, db: Session = Depends(get_db)) -> TaxDocument
     response_class=FileResponse,
     summary="Download / view original PDF file",
 )
-def get_document_file(doc_id: str, db: Session = Depends(get_db)) -> FileResponse:
+def get_document_file(doc_id: str, db: Session = Depends(get_db)) -> Response:
     doc = db.get(TaxDocumentORM, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    storage_path = Path(doc.storage_path)
-    if not storage_path.exists():
-        raise HTTPException(status_code=500, detail="Stored file is missing on disk")
+    storage = get_storage().for_location(doc.storage_path)
+    download_url = storage.download_url(doc.storage_path, doc.original_filename)
+    if download_url:
+        # Let the client fetch the bytes from object storage instead of through the API.
+        return RedirectResponse(download_url, status_code=307)
+
+    storage_path = storage.local_path(doc.storage_path)
+    if storage_path is None or not storage_path.exists():
+        raise HTTPException(status_code=404, detail="Stored file is missing")
 
     return FileResponse(
         storage_path,
@@ -592,6 +1215,14 @@ def get_document_file(doc_id: str, db: Session = Depends(get_db)) -> FileRespons
     )
 
 
+@app.get(
+    "/api/ingest/metrics",
+    summary="Ingestion queue depth, buffered bytes and admission rejections",
+)
+def get_ingest_metrics() -> dict:
+    return admission.snapshot()
+
+
 @app.get("/healthz", tags=["health"])
 def healthcheck() -> dict:
     """Simple health check endpoint."""
@@ -603,20 +1234,20 @@ def healthcheck() -> dict:
     summary="Delete all documents",
 )
 def delete_all_documents(db: Session = Depends(get_db)) -> dict:
-    """Delete all documents from database and file system."""
+    """Delete all documents from database and storage."""
     docs = db.query(TaxDocumentORM).all()
     deleted_count = 0
 
+    storage = get_storage()
     for doc in docs:
-        # Delete file from disk
-        storage_path = Path(doc.storage_path)
-        if storage_path.exists():
-            try:
-                storage_path.unlink()
-            except Exception:
-                pass  # Continue even if file deletion fails
+        # Delete file from storage
+        try:
+            storage.for_location(doc.storage_path).delete(doc.storage_path)
+        except Exception:
+            pass  # Continue even if file deletion fails
 
         # Delete from database
+        db.query(OcrPageORM).filter(OcrPageORM.doc_id == doc.id).delete()
         db.delete(doc)
         deleted_count += 1
 
@@ -682,6 +1313,149 @@ def get_tax_document_text_tool(doc_id: str) -> TaxDocumentTextResponse:
         db.close()
 
 
+@mcp_server.tool()
+def get_tax_documents_tool(
+    doc_ids: List[str],
+    fields: Optional[List[str]] = None,
+    max_text_chars_per_document: Optional[int] = None,
+) -> TaxDocumentBatchResponse:
+    """Fetch several tax documents by id in one call.
+
+    `fields` selects what to return for each document (default: all metadata fields); add
+    `full_text` to include the extracted text. Text is cut to `max_text_chars_per_document`
+    and to a total budget shared by the whole call; cut documents are listed in
+    `truncated_ids`, unknown ids in `missing_ids`.
+    """
+
+    requested = list(dict.fromkeys(doc_ids))
+    if len(requested) > settings.mcp_batch_max_documents:
+        raise ValueError(
+            f"Too many documents requested ({len(requested)}); "
+            f"the limit is {settings.mcp_batch_max_documents} per call"
+        )
+    selected = list(dict.fromkeys(["id", *(fields or TaxDocumentMetadata.model_fields)]))
+    unknown = [name for name in selected if name not in TAX_DOCUMENT_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(TAX_DOCUMENT_FIELDS)}"
+        )
+    if not requested:
+        return TaxDocumentBatchResponse(documents=[])
+
+    text_budget = settings.mcp_batch_max_text_chars
+    include_text = "full_text" in selected
+    columns = [getattr(TaxDocumentORM, name) for name in selected if name != "full_text"]
+    if include_text:
+        text_cap = text_budget
+        if max_text_chars_per_document is not None:
+            text_cap = max(0, min(max_text_chars_per_document, text_budget))
+        # Cut the text in SQL so oversized documents are never loaded in full
+        columns += [
+            func.substr(TaxDocumentORM.full_text, 1, text_cap).label("full_text"),
+            func.length(TaxDocumentORM.full_text).label("full_text_length"),
+        ]
+
+    db = SessionLocal()
+    try:
+        rows = db.query(*columns).filter(TaxDocumentORM.id.in_(requested)).all()
+    finally:
+        db.close()
+
+    found = {row.id: row._asdict() for row in rows}
+    documents = []
+    truncated_ids = []
+    for doc_id in requested:
+        doc = found.get(doc_id)
+        if doc is None:
+            continue
+        if include_text:
+            doc["full_text"] = (doc["full_text"] or "")[:text_budget]
+            text_budget -= len(doc["full_text"])
+            if len(doc["full_text"]) < (doc["full_text_length"] or 0):
+                truncated_ids.append(doc_id)
+        documents.append({name: doc[name] for name in selected})
+
+    return TaxDocumentBatchResponse(
+        documents=documents,
+        missing_ids=[doc_id for doc_id in requested if doc_id not in found],
+        truncated_ids=truncated_ids,
+    )
+
+
+@mcp_server.tool()
+def aggregate_tax_documents_tool(
+    group_by: List[TaxDocumentGroupField],
+    tax_year: Optional[int] = None,
+    doc_type: Optional[str] = None,
+    status: Optional[str] = None,
+    include_doc_ids: bool = True,
+) -> TaxDocumentAggregateResponse:
+    """Count tax documents grouped by tax_year, doc_type, status and/or payer_name.
+
+    Each group also lists its document ids, newest first and capped per group, unless
+    `include_doc_ids` is false.
+    """
+
+    dimensions = list(dict.fromkeys(group_by))
+    if not dimensions:
+        raise ValueError("group_by needs at least one of tax_year, doc_type, status, payer_name")
+    group_columns = [getattr(TaxDocumentORM, name) for name in dimensions]
+
+    def filtered(query):
+        if tax_year is not None:
+            query = query.filter(TaxDocumentORM.tax_year == tax_year)
+        if doc_type is not None:
+            query = query.filter(TaxDocumentORM.doc_type == doc_type)
+        if status is not None:
+            query = query.filter(TaxDocumentORM.status == status)
+        return query
+
+    max_ids = settings.mcp_aggregate_max_ids_per_group
+    db = SessionLocal()
+    try:
+        counts = (
+            filtered(db.query(*group_columns, func.count(TaxDocumentORM.id)))
+            .group_by(*group_columns)
+            .order_by(*group_columns)
+            .all()
+        )
+        ids_by_key: dict[tuple, List[str]] = defaultdict(list)
+        if include_doc_ids and max_ids:
+            # Rank documents within each group so the per-group cap is applied in SQL
+            rank = (
+                func.row_number()
+                .over(
+                    partition_by=group_columns,
+                    order_by=(TaxDocumentORM.ingested_at.desc(), TaxDocumentORM.id),
+                )
+                .label("group_rank")
+            )
+            ranked = filtered(db.query(*group_columns, TaxDocumentORM.id, rank)).subquery()
+            id_rows = (
+                db.query(*(ranked.c[name] for name in dimensions), ranked.c.id)
+                .filter(ranked.c.group_rank <= max_ids)
+                .order_by(ranked.c.group_rank)
+            )
+            for *key, doc_id in id_rows:
+                ids_by_key[tuple(key)].append(doc_id)
+    finally:
+        db.close()
+
+    groups = [
+        TaxDocumentGroup(
+            key=dict(zip(dimensions, key)),
+            count=count,
+            doc_ids=ids_by_key.get(tuple(key), []),
+        )
+        for *key, count in counts
+    ]
+    return TaxDocumentAggregateResponse(
+        group_by=dimensions,
+        total=sum(group.count for group in groups),
+        groups=groups,
+    )
+
+
 mcp_asgi_app = mcp_server.streamable_http_app()
 app.mount("/mcp", mcp_asgi_app)
 
@@ -0,0 +1,179 @@
+"""Admission control for document ingestion.
+
+Every accepted upload holds a ticket until its background processing finishes. New uploads
+are rejected while a global limit (in-flight jobs, buffered bytes) or a per-client limit
+(in-flight jobs, uploads per minute) is exhausted, with a ``Retry-After`` hint so clients
+can back off instead of piling more work onto a saturated queue. A limit of ``0`` disables it.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+RATE_WINDOW_SECONDS = 60.0
+DEFAULT_RETRY_AFTER_SECONDS = 30
+MAX_RETRY_AFTER_SECONDS = 300
+# Idle per-client rate windows are dropped once this many clients are tracked.
+MAX_TRACKED_CLIENTS = 10_000
+# Weight of the newest job in the moving average of processing time.
+JOB_DURATION_SMOOTHING = 0.2
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an upload cannot be accepted right now."""
+
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionTicket:
+    client_id: str
+    size_bytes: int
+    admitted_at: float
+    released: bool = field(default=False)
+
+
+class AdmissionController:
+    """Track in-flight ingestion work and decide whether to accept more."""
+
+    def __init__(
+        self,
+        max_inflight_jobs: int,
+        max_buffered_bytes: int,
+        per_client_max_inflight: int,
+        per_client_uploads_per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_inflight_jobs = max_inflight_jobs
+        self.max_buffered_bytes = max_buffered_bytes
+        self.per_client_max_inflight = per_client_max_inflight
+        self.per_client_uploads_per_minute = per_client_uploads_per_minute
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._inflight_jobs = 0
+        self._buffered_bytes = 0
+        self._client_inflight: Counter[str] = Counter()
+        self._client_uploads: defaultdict[str, deque[float]] = defaultdict(deque)
+        self._admitted_total = 0
+        self._rejected_total: Counter[str] = Counter()
+        self._avg_job_seconds: float | None = None
+
+    def admit(self, client_id: str, size_bytes: int) -> AdmissionTicket:
+        """Reserve capacity for one upload or raise AdmissionRejectedError."""
+
+        with self._lock:
+            now = self._clock()
+            if len(self._client_uploads) > MAX_TRACKED_CLIENTS:
+                self._prune_idle_clients(now)
+            uploads = self._client_uploads[client_id]
+            while uploads and now - uploads[0] >= RATE_WINDOW_SECONDS:
+                uploads.popleft()
+
+            if self.per_client_uploads_per_minute and (
+                len(uploads) >= self.per_client_uploads_per_minute
+            ):
+                retry_after = math.ceil(RATE_WINDOW_SECONDS - (now - uploads[0]))
+                self._reject(
+                    429, "client_rate", "Upload rate limit exceeded for this client.", retry_after
+                )
+            if self.per_client_max_inflight and (
+                self._client_inflight[client_id] >= self.per_client_max_inflight
+            ):
+                self._reject(
+                    429,
+                    "client_inflight",
+                    "Too many documents from this client are still processing.",
+                    self._retry_after(),
+                )
+            if self.max_inflight_jobs and self._inflight_jobs >= self.max_inflight_jobs:
+                self._reject(
+                    503, "queue_full", "Document processing queue is full.", self._retry_after()
+                )
+            if self.max_buffered_bytes and (
+                self._buffered_bytes + size_bytes > self.max_buffered_bytes
+            ):
+                self._reject(
+                    503,
+                    "buffer_full",
+                    "Too many bytes are waiting to be processed.",
+                    self._retry_after(),
+                )
+
+            uploads.append(now)
+            self._inflight_jobs += 1
+            self._buffered_bytes += size_bytes
+            self._client_inflight[client_id] += 1
+            self._admitted_total += 1
+            return AdmissionTicket(client_id=client_id, size_bytes=size_bytes, admitted_at=now)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Return a ticket's capacity once its processing finished (or never started)."""
+
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._inflight_jobs -= 1
+            self._buffered_bytes -= ticket.size_bytes
+            self._client_inflight[ticket.client_id] -= 1
+            if self._client_inflight[ticket.client_id] <= 0:
+                del self._client_inflight[ticket.client_id]
+
+            duration = self._clock() - ticket.admitted_at
+            if self._avg_job_seconds is None:
+                self._avg_job_seconds = duration
+            else:
+                self._avg_job_seconds += JOB_DURATION_SMOOTHING * (
+                    duration - self._avg_job_seconds
+                )
+
+    def snapshot(self) -> dict:
+        """Current queue depth, buffered bytes and rejection counters."""
+
+        with self._lock:
+            return {
+                "inflight_jobs": self._inflight_jobs,
+                "max_inflight_jobs": self.max_inflight_jobs,
+                "buffered_bytes": self._buffered_bytes,
+                "max_buffered_bytes": self.max_buffered_bytes,
+                "clients_with_inflight_jobs": len(self._client_inflight),
+                "admitted_total": self._admitted_total,
+                "rejected_total": dict(self._rejected_total),
+                "avg_job_seconds": self._avg_job_seconds,
+            }
+
+    def _prune_idle_clients(self, now: float) -> None:
+        idle = [
+            client_id
+            for client_id, uploads in self._client_uploads.items()
+            if not uploads or now - uploads[-1] >= RATE_WINDOW_SECONDS
+        ]
+        for client_id in idle:
+            del self._client_uploads[client_id]
+
+    def _retry_after(self) -> int:
+        if self._avg_job_seconds is None:
+            return DEFAULT_RETRY_AFTER_SECONDS
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(self._avg_job_seconds)))
+
+    def _reject(self, status_code: int, reason: str, detail: str, retry_after: int) -> None:
+        self._rejected_total[reason] += 1
+        logger.warning(
+            "Rejected upload (%s): %d jobs in flight, %d bytes buffered",
+            reason,
+            self._inflight_jobs,
+            self._buffered_bytes,
+        )
+        raise AdmissionRejectedError(status_code, reason, detail, retry_after)
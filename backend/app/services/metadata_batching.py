@@ -0,0 +1,162 @@
+"""Micro-batching of metadata extraction requests.
+
+Background processing threads submit ``(doc_id, text)`` pairs and block on the returned
+future. A collector thread groups submissions for up to ``max_wait_ms`` or
+``max_batch_size`` documents and hands each group to ``extract_batch`` as one model request.
+Documents missing from a batch result (or the whole group, if the batch call raises) are
+retried individually with ``extract_one``, in parallel on the same worker pool. At most
+``max_concurrency`` model calls are in flight at once.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _PendingRequest(Generic[T]):
+    doc_id: str
+    text: str
+    future: Future[T] = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MetadataBatcher(Generic[T]):
+    """Collect per-document extraction requests into batched model calls."""
+
+    def __init__(
+        self,
+        extract_batch: Callable[[dict[str, str]], dict[str, T]],
+        extract_one: Callable[[str], T],
+        max_batch_size: int,
+        max_wait_ms: int,
+        max_concurrency: int = 4,
+    ) -> None:
+        self._extract_batch = extract_batch
+        self._extract_one = extract_one
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrency = max_concurrency
+
+        self._pending: list[_PendingRequest[T]] = []
+        self._condition = threading.Condition()
+        self._collector: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def submit(self, doc_id: str, text: str) -> Future[T]:
+        """Queue a document for extraction and return a future for its result."""
+
+        request: _PendingRequest[T] = _PendingRequest(doc_id=doc_id, text=text)
+        if self.max_batch_size <= 1:
+            self._get_executor().submit(self._extract_individually, [request])
+            return request.future
+
+        with self._condition:
+            self._pending.append(request)
+            self._ensure_collector()
+            self._condition.notify()
+        return request.future
+
+    def extract(self, doc_id: str, text: str) -> T:
+        """Submit a document and wait for its extraction."""
+
+        return self.submit(doc_id, text).result()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="metadata-batch",
+                )
+            return self._executor
+
+    def _ensure_collector(self) -> None:
+        if self._collector is not None and self._collector.is_alive():
+            return
+        self._get_executor()
+        self._collector = threading.Thread(
+            target=self._collect_forever,
+            name="metadata-batch-collector",
+            daemon=True,
+        )
+        self._collector.start()
+
+    def _collect_forever(self) -> None:
+        while True:
+            batch = self._next_batch()
+            assert self._executor is not None
+            self._executor.submit(self._dispatch, batch)
+
+    def _next_batch(self) -> list[_PendingRequest[T]]:
+        """Block until a batch is full or its oldest request has waited ``max_wait_ms``."""
+
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+
+            deadline = self._pending[0].enqueued_at + self.max_wait_ms / 1000
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch: list[_PendingRequest[T]] = []
+            seen: set[str] = set()
+            for request in list(self._pending):
+                if len(batch) >= self.max_batch_size:
+                    break
+                # Results are keyed by doc id, so a resubmitted id waits for the next batch.
+                if request.doc_id in seen:
+                    continue
+                seen.add(request.doc_id)
+                batch.append(request)
+                self._pending.remove(request)
+            return batch
+
+    def _dispatch(self, batch: list[_PendingRequest[T]]) -> None:
+        if len(batch) == 1:
+            self._extract_individually(batch)
+            return
+
+        try:
+            results = self._extract_batch({request.doc_id: request.text for request in batch})
+        except Exception as exc:
+            logger.warning(
+                "Batched metadata extraction of %d documents failed: %s", len(batch), exc
+            )
+            results = {}
+
+        missing: list[_PendingRequest[T]] = []
+        for request in batch:
+            if request.doc_id in results:
+                request.future.set_result(results[request.doc_id])
+            else:
+                missing.append(request)
+
+        if missing:
+            logger.info(
+                "Falling back to per-document extraction for %d of %d documents",
+                len(missing),
+                len(batch),
+            )
+            assert self._executor is not None
+            for request in missing:
+                self._executor.submit(self._extract_individually, [request])
+
+    def _extract_individually(self, requests: list[_PendingRequest[T]]) -> None:
+        for request in requests:
+            try:
+                request.future.set_result(self._extract_one(request.text))
+            except Exception as exc:
+                request.future.set_exception(exc)
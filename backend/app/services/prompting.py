@@ -0,0 +1,242 @@
+"""Token-budgeted compaction of document text for LLM metadata extraction."""
+
+import logging
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o / gpt-5 family
+GAP_MARKER = "[...]"
+
+# Share of the budget reserved for the first page before anchor regions are considered.
+FIRST_PAGE_BUDGET_SHARE = 0.5
+# Characters treated as the "first page" when the text carries no page markers.
+FIRST_PAGE_FALLBACK_CHARS = 3000
+# Lines of context kept on each side of an anchor line.
+ANCHOR_CONTEXT_LINES = 2
+# A line repeated at least this many times is treated as a page header/footer.
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_CHARS = 120
+
+PAGE_MARKER_PATTERN = re.compile(r"^--- Page (\d+) ---$")
+
+# Lines that identify the form type or tax year.
+FORM_ANCHOR_PATTERN = re.compile(
+    r"\b(form\s+(w-?2g?|1099|1098|1040|1065|1120)|w-?2g?\b|1099-?[a-z]{1,4}\b|1098-?[et]?\b"
+    r"|schedule\s+(k-?1|c|e|k)\b|omb\s+no|tax\s+year|calendar\s+year|(19|20)\d{2}\s+form)",
+    re.IGNORECASE,
+)
+
+# Lines that label names and identification numbers.
+NAME_ANCHOR_PATTERN = re.compile(
+    r"(payer'?s?|recipient'?s?|employer'?s?|employee'?s?|lender'?s?|borrower'?s?|filer'?s?"
+    r"|student'?s?|partner'?s?|partnership'?s?|account\s+holder)\s*(name|tin|federal|identification)"
+    r"|\b(ein|tin|ssn)\b|identification\s+number|social\s+security",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class CompactedPrompt:
+    """Result of fitting document text into a token budget."""
+
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+    truncated: bool
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> Callable[[str], int]:
+    """Return a token counting function backed by tiktoken when it is available.
+
+    Falls back to a ~4 characters per token estimate, with a warning, if tiktoken is not
+    installed or its encoding file cannot be loaded (it is downloaded on first use; pre-cache
+    it with ``TIKTOKEN_CACHE_DIR`` on hosts without network access).
+    """
+
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as exc:
+        logger.warning(
+            "tiktoken %s encoding unavailable (%s); prompt token budgets are estimated at "
+            "~4 characters per token",
+            TOKENIZER_ENCODING,
+            exc,
+        )
+        return estimate_tokens
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used when no tokenizer is available."""
+
+    return (len(text) + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    return get_token_counter()(text)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces/tabs, strip line ends and squeeze blank lines."""
+
+    lines = [re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in text.splitlines()]
+    normalized: list[str] = []
+    for line in lines:
+        if not line and (not normalized or not normalized[-1]):
+            continue
+        normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def dedupe_repeated_lines(lines: list[str]) -> list[str]:
+    """Keep only the first occurrence of short lines repeated across pages (headers/footers)."""
+
+    counts = Counter(
+        line
+        for line in lines
+        if line and len(line) <= REPEATED_LINE_MAX_CHARS and not PAGE_MARKER_PATTERN.match(line)
+    )
+    repeated = {line for line, count in counts.items() if count >= REPEATED_LINE_MIN_COUNT}
+    if not repeated:
+        return lines
+
+    seen: set[str] = set()
+    deduped: list[str] = []
+    for line in lines:
+        if line in repeated:
+            if line in seen:
+                continue
+            seen.add(line)
+        deduped.append(line)
+    return deduped
+
+
+def _first_page_line_count(lines: list[str]) -> int:
+    """Number of leading lines that make up the first page."""
+
+    markers = [i for i, line in enumerate(lines) if PAGE_MARKER_PATTERN.match(line)]
+    if len(markers) >= 2:
+        return markers[1]
+
+    chars = 0
+    for i, line in enumerate(lines):
+        chars += len(line) + 1
+        if chars >= FIRST_PAGE_FALLBACK_CHARS:
+            return i + 1
+    return len(lines)
+
+
+def _anchor_windows(lines: list[str], start: int) -> list[tuple[int, int]]:
+    """Return [begin, end) line windows around form identifiers and name/EIN labels.
+
+    Form identifiers are ranked ahead of name labels; within a rank, earlier lines win.
+    """
+
+    form_hits = [i for i in range(start, len(lines)) if FORM_ANCHOR_PATTERN.search(lines[i])]
+    form_hit_set = set(form_hits)
+    name_hits = [
+        i
+        for i in range(start, len(lines))
+        if i not in form_hit_set and NAME_ANCHOR_PATTERN.search(lines[i])
+    ]
+    return [
+        (max(start, i - ANCHOR_CONTEXT_LINES), min(len(lines), i + ANCHOR_CONTEXT_LINES + 1))
+        for i in form_hits + name_hits
+    ]
+
+
+def _render(lines: list[str], selected: set[int]) -> str:
+    parts: list[str] = []
+    previous = -1
+    for i in sorted(selected):
+        if previous != -1 and i != previous + 1:
+            parts.append(GAP_MARKER)
+        parts.append(lines[i])
+        previous = i
+    if previous != -1 and previous != len(lines) - 1:
+        parts.append(GAP_MARKER)
+    return "\n".join(parts)
+
+
+def _truncate_to_budget(text: str, token_budget: int) -> str:
+    """Cut text down to the budget, line by line, then by characters."""
+
+    count = get_token_counter()
+    if count(text) <= token_budget:
+        return text
+
+    kept: list[str] = []
+    used = 0
+    for line in text.split("\n"):
+        line_tokens = count(line) + 1
+        if used + line_tokens > token_budget:
+            remaining = token_budget - used
+            if remaining > 0 and not kept:
+                kept.append(line[: remaining * 4])
+            break
+        kept.append(line)
+        used += line_tokens
+    return "\n".join(kept)
+
+
+def compact_document_text(text: str, token_budget: int) -> CompactedPrompt:
+    """Fit document text into ``token_budget`` tokens, keeping the parts that identify it.
+
+    The text is whitespace-normalized and stripped of repeated page headers/footers. If it
+    still exceeds the budget, the first page is kept (up to half the budget), followed by
+    windows around form identifiers and name/EIN labels until the budget is spent.
+    """
+
+    count = get_token_counter()
+    original_tokens = count(text)
+
+    lines = dedupe_repeated_lines(normalize_whitespace(text).split("\n"))
+    cleaned = "\n".join(lines)
+    cleaned_tokens = count(cleaned)
+    if cleaned_tokens <= token_budget:
+        return CompactedPrompt(cleaned, original_tokens, cleaned_tokens, truncated=False)
+
+    line_tokens = [count(line) + 1 for line in lines]
+    selected: set[int] = set()
+    used = 0
+
+    head_budget = int(token_budget * FIRST_PAGE_BUDGET_SHARE)
+    head_end = _first_page_line_count(lines)
+    for i in range(head_end):
+        if used + line_tokens[i] > head_budget:
+            break
+        selected.add(i)
+        used += line_tokens[i]
+
+    gap_tokens = count(GAP_MARKER) + 1
+    for begin, end in _anchor_windows(lines, start=len(selected)):
+        window = [i for i in range(begin, end) if i not in selected]
+        cost = sum(line_tokens[i] for i in window) + 2 * gap_tokens
+        if not window or used + cost > token_budget:
+            continue
+        selected.update(window)
+        used += cost
+
+    # Spend whatever budget is left on the lines following the first page.
+    for i in range(len(lines)):
+        if i in selected:
+            continue
+        if used + line_tokens[i] + gap_tokens > token_budget:
+            break
+        selected.add(i)
+        used += line_tokens[i]
+
+    compacted = _truncate_to_budget(_render(lines, selected), token_budget)
+    return CompactedPrompt(compacted, original_tokens, count(compacted), truncated=True)
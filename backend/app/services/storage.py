@@ -0,0 +1,267 @@
+"""Document blob storage backends.
+
+Documents are addressed by a *key* (``{doc_id}.pdf``) when written and by the *location*
+string returned from :meth:`DocumentStorage.save` afterwards; the location is what gets
+persisted in ``TaxDocumentORM.storage_path``. Local locations are plain filesystem paths
+(so rows written before sharding keep working) and S3 locations are ``s3://bucket/key``.
+"""
+
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from app.core.config import settings
+
+DEFAULT_LOCAL_ROOT = Path(__file__).resolve().parents[1] / "uploads"
+
+
+def inline_content_disposition(filename: str) -> str:
+    """``Content-Disposition`` value for ``filename``, quoted like Starlette's FileResponse."""
+
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"inline; filename*=utf-8''{quoted}"
+    return f'inline; filename="{filename}"'
+
+
+class StorageError(Exception):
+    """Raised when a stored document cannot be found or written."""
+
+
+@dataclass(frozen=True)
+class PresignedUpload:
+    """Everything a client needs to upload a document straight to storage."""
+
+    key: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+
+
+def shard_key(key: str, depth: int) -> str:
+    """Prefix ``key`` with ``depth`` two-character directories derived from its hash."""
+
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    shards = [digest[i * 2 : i * 2 + 2] for i in range(depth)]
+    return "/".join([*shards, key])
+
+
+class DocumentStorage(ABC):
+    """Interface shared by the storage backends."""
+
+    supports_direct_upload = False
+
+    @abstractmethod
+    def location_for(self, key: str) -> str:
+        """Location a document stored under ``key`` ends up at."""
+
+    @abstractmethod
+    def save(self, key: str, data: bytes) -> str:
+        """Store ``data`` under ``key`` and return its location."""
+
+    @abstractmethod
+    def read(self, location: str) -> bytes:
+        """Return the stored bytes, raising StorageError if the document is missing."""
+
+    @abstractmethod
+    def exists(self, location: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, location: str) -> None:
+        """Remove the stored document; missing documents are ignored."""
+
+    def for_location(self, location: str) -> "DocumentStorage":
+        """Backend holding ``location``; rows written before a backend switch keep their own."""
+
+        return self
+
+    def local_path(self, location: str) -> Path | None:
+        """Filesystem path for backends that can serve files directly."""
+
+        return None
+
+    def download_url(self, location: str, filename: str) -> str | None:
+        """Short-lived URL clients can download the document from, if supported."""
+
+        return None
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> PresignedUpload:
+        raise StorageError(f"{type(self).__name__} does not support direct uploads")
+
+
+class LocalShardedStorage(DocumentStorage):
+    """Filesystem storage that spreads documents over hashed subdirectories."""
+
+    def __init__(self, root: Path, shard_depth: int = 2) -> None:
+        self.root = root
+        self.shard_depth = shard_depth
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def location_for(self, key: str) -> str:
+        return str(self.root / shard_key(key, self.shard_depth))
+
+    def save(self, key: str, data: bytes) -> str:
+        path = Path(self.location_for(key))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a sibling temp file first so readers never see a partial document.
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        return str(path)
+
+    def read(self, location: str) -> bytes:
+        try:
+            return Path(location).read_bytes()
+        except FileNotFoundError as exc:
+            raise StorageError(f"Stored file is missing: {location}") from exc
+
+    def exists(self, location: str) -> bool:
+        return Path(location).exists()
+
+    def delete(self, location: str) -> None:
+        Path(location).unlink(missing_ok=True)
+
+    def local_path(self, location: str) -> Path | None:
+        return Path(location)
+
+
+class S3Storage(DocumentStorage):
+    """S3-compatible object storage (AWS S3, MinIO, ...) with presigned uploads/downloads."""
+
+    supports_direct_upload = True
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        shard_depth: int = 2,
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        url_expiry_seconds: int = 900,
+        client=None,
+    ) -> None:
+        if client is None:
+            try:
+                import boto3
+            except ImportError as exc:
+                raise StorageError(
+                    "The s3 storage backend requires boto3 (install taxgpt-backend[s3])."
+                ) from exc
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.shard_depth = shard_depth
+        self.url_expiry_seconds = url_expiry_seconds
+
+    def object_key(self, key: str) -> str:
+        sharded = shard_key(key, self.shard_depth)
+        return f"{self.prefix}/{sharded}" if self.prefix else sharded
+
+    def location_for(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+
+    def for_location(self, location: str) -> DocumentStorage:
+        if location.startswith("s3://"):
+            return self
+        # Documents stored before switching to s3 are not migrated and stay on local disk.
+        return _local_storage()
+
+    def _split(self, location: str) -> tuple[str, str]:
+        if not location.startswith("s3://"):
+            raise StorageError(f"Not an S3 location: {location}")
+        bucket, _, key = location.removeprefix("s3://").partition("/")
+        return bucket, key
+
+    def save(self, key: str, data: bytes) -> str:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            Body=data,
+            ContentType="application/pdf",
+        )
+        return self.location_for(key)
+
+    def read(self, location: str) -> bytes:
+        bucket, key = self._split(location)
+        try:
+            return self.client.get_object(Bucket=bucket, Key=key)["Body"].read()
+        except self.client.exceptions.NoSuchKey as exc:
+            raise StorageError(f"Stored file is missing: {location}") from exc
+
+    def exists(self, location: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        bucket, key = self._split(location)
+        try:
+            self.client.head_object(Bucket=bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, location: str) -> None:
+        bucket, key = self._split(location)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def download_url(self, location: str, filename: str) -> str | None:
+        bucket, key = self._split(location)
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "ResponseContentType": "application/pdf",
+                "ResponseContentDisposition": inline_content_disposition(filename),
+            },
+            ExpiresIn=self.url_expiry_seconds,
+        )
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> PresignedUpload:
+        object_key = self.object_key(key)
+        post = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=object_key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes],
+            ],
+            ExpiresIn=self.url_expiry_seconds,
+        )
+        return PresignedUpload(
+            key=object_key,
+            url=post["url"],
+            fields=post["fields"],
+            expires_in=self.url_expiry_seconds,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> DocumentStorage:
+    """Return the storage backend selected by ``TAXGPT_STORAGE_BACKEND``."""
+
+    if settings.storage_backend == "s3":
+        if not settings.s3_bucket:
+            raise StorageError("TAXGPT_S3_BUCKET must be set for the s3 storage backend.")
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            shard_depth=settings.storage_shard_depth,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            url_expiry_seconds=settings.storage_url_expiry_seconds,
+        )
+
+    return _local_storage()
+
+
+@lru_cache(maxsize=1)
+def _local_storage() -> LocalShardedStorage:
+    root = Path(settings.storage_local_root) if settings.storage_local_root else DEFAULT_LOCAL_ROOT
+    return LocalShardedStorage(root, shard_depth=settings.storage_shard_depth)
@@ -0,0 +1,131 @@
+"""MCP tool-call latency for one agent case: per-document tools vs the bulk/aggregate tools.
+
+Run from ``backend/``:
+
+    uv run python -m benchmarks.bench_mcp_tools [--case-docs 50] [--docs 2000] [--rtt-ms 40]
+
+The tools are called through a real MCP client session (JSON-RPC over in-memory streams)
+against a throwaway SQLite database, so the numbers include validation and serialization but
+no network. ``--rtt-ms`` adds an assumed network round trip per call to the totals, which is
+where sequential per-document calls hurt most.
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from mcp.shared.memory import create_connected_server_and_client_session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+
+
+def seed(session, docs: int, text_kb: int) -> list[str]:
+    rng = random.Random(7)
+    words = ["wages", "withheld", "1099-B", "proceeds", "basis", "2024", "NORTHWIND", "box"]
+    started = datetime(2025, 1, 1)
+    ids = []
+    for i in range(docs):
+        ids.append(f"doc-{i:06d}")
+        session.add(
+            main.TaxDocumentORM(
+                id=ids[-1],
+                original_filename=f"statement-{i}.pdf",
+                storage_path=f"/uploads/{i}.pdf",
+                doc_type=rng.choice(["w2", "1099_b", "1099_int", "k1"]),
+                tax_year=rng.choice([2022, 2023, 2024]),
+                payer_name=rng.choice(["NORTHWIND SECURITIES LLC", "ACME WIDGETS INC", None]),
+                taxpayer_name="Jane Q Taxpayer",
+                num_pages=rng.randint(1, 40),
+                ingested_at=started + timedelta(minutes=i),
+                full_text=" ".join(rng.choice(words) for _ in range(text_kb * 1024 // 7)),
+                status=rng.choice(["completed"] * 9 + ["failed"]),
+            )
+        )
+    session.commit()
+    return ids
+
+
+async def per_document(client, case_ids: list[str]) -> int:
+    for doc_id in case_ids:
+        await client.call_tool("get_tax_document_metadata_tool", {"doc_id": doc_id})
+        await client.call_tool("get_tax_document_text_tool", {"doc_id": doc_id})
+    return 2 * len(case_ids)
+
+
+async def bulk(client, case_ids: list[str]) -> int:
+    fields = [*main.TaxDocumentMetadata.model_fields, "full_text"]
+    await client.call_tool("get_tax_documents_tool", {"doc_ids": case_ids, "fields": fields})
+    return 1
+
+
+async def list_and_count(client, case_ids: list[str]) -> int:
+    result = await client.call_tool("list_tax_documents", {"tax_year": 2024})
+    Counter((doc["doc_type"], doc["status"]) for doc in result.structuredContent["result"])
+    return 1
+
+
+async def aggregate(client, case_ids: list[str]) -> int:
+    await client.call_tool(
+        "aggregate_tax_documents_tool", {"group_by": ["doc_type", "status"], "tax_year": 2024}
+    )
+    return 1
+
+
+async def run(args: argparse.Namespace, case_ids: list[str]) -> None:
+    scenarios = [
+        ("fetch", "per-document tools", per_document),
+        ("fetch", "get_tax_documents_tool", bulk),
+        ("group", "list_tax_documents + count", list_and_count),
+        ("group", "aggregate_tax_documents_tool", aggregate),
+    ]
+    async with create_connected_server_and_client_session(main.mcp_server._mcp_server) as client:
+        for task, name, scenario in scenarios:
+            samples = []
+            calls = 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                calls = await scenario(client, case_ids)
+                samples.append((time.perf_counter() - started) * 1000)
+            ms = statistics.median(samples)
+            total = ms + calls * args.rtt_ms
+            print(f"  {task:<6}{name:<32}{calls:>5} calls {ms:>9.1f} ms {total:>9.1f} ms")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case-docs", type=int, default=50, help="documents in the agent case")
+    parser.add_argument("--docs", type=int, default=2000, help="documents in the database")
+    parser.add_argument("--text-kb", type=int, default=2, help="full_text size per document")
+    parser.add_argument("--rtt-ms", type=float, default=40.0, help="assumed network RTT per call")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("mcp").setLevel(logging.WARNING)  # one INFO line per tool call otherwise
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        main.Base.metadata.create_all(engine)
+        main.SessionLocal = sessionmaker(bind=engine)
+        with main.SessionLocal() as session:
+            ids = seed(session, args.docs, args.text_kb)
+        case_ids = random.Random(11).sample(ids, args.case_docs)
+
+        print(
+            f"{args.case_docs}-document case, {args.docs} documents in the database, "
+            f"{args.text_kb} KB of text each"
+        )
+        print(f"  {'':<6}{'':<32}{'':>11} {'in-process':>12} {f'+{args.rtt_ms:g} ms RTT':>12}")
+        asyncio.run(run(args, case_ids))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,99 @@
+"""Compare the legacy ``text[:15000]`` prompt with the token-budgeted compaction.
+
+Run from ``backend/``:
+
+    uv run python -m benchmarks.bench_prompt_compaction [--budget 1500] [--live]
+
+Without ``--live`` accuracy is measured offline as "every field the extractor needs is still
+present in the prompt text". With ``--live`` both prompts are sent to the metadata model and
+the extracted fields are compared (requires an OpenAI API key).
+"""
+
+import argparse
+import re
+import time
+
+from app.services.prompting import compact_document_text, count_tokens, get_token_counter
+
+from benchmarks.fixtures import DocumentFixture, all_fixtures
+
+LEGACY_CHAR_LIMIT = 15000
+LIVE_FIELDS = ("doc_type", "tax_year", "payer_name", "taxpayer_name", "payer_ein")
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", " ", text).lower()
+
+
+def fields_retained(prompt_text: str, fixture: DocumentFixture) -> set[str]:
+    haystack = _squash(prompt_text)
+    return {key for key, value in fixture.expected.items() if _squash(value) in haystack}
+
+
+def run_offline(budget: int) -> None:
+    counter = get_token_counter()
+    tokenizer = "tiktoken" if counter.__name__ != "estimate_tokens" else "estimate (~4 chars)"
+    print(f"tokenizer: {tokenizer}   budget: {budget} tokens\n")
+    header = f"{'fixture':<22}{'legacy tok':>11}{'compact tok':>12}{'saved':>8}{'ms':>8}  accuracy"
+    print(header)
+    print("-" * len(header))
+
+    total_legacy = total_compact = 0
+    for fixture in all_fixtures():
+        legacy_text = fixture.text[:LEGACY_CHAR_LIMIT]
+        legacy_tokens = count_tokens(legacy_text)
+
+        started = time.perf_counter()
+        compacted = compact_document_text(fixture.text, budget)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        legacy_fields = fields_retained(legacy_text, fixture)
+        compact_fields = fields_retained(compacted.text, fixture)
+        if compact_fields >= legacy_fields:
+            accuracy = f"unchanged ({len(compact_fields)}/{len(fixture.expected)})"
+        else:
+            accuracy = f"LOST {sorted(legacy_fields - compact_fields)}"
+
+        saved = 1 - compacted.compacted_tokens / legacy_tokens if legacy_tokens else 0.0
+        print(
+            f"{fixture.name:<22}{legacy_tokens:>11}{compacted.compacted_tokens:>12}"
+            f"{saved:>8.0%}{elapsed_ms:>8.1f}  {accuracy}"
+        )
+        total_legacy += legacy_tokens
+        total_compact += compacted.compacted_tokens
+
+    saved_total = 1 - total_compact / total_legacy if total_legacy else 0.0
+    print(f"\ntotal input tokens: {total_legacy} -> {total_compact} ({saved_total:.0%} saved)")
+
+
+def run_live(budget: int) -> None:
+    from app.core.config import settings
+    from app.main import extract_document_metadata_with_llm
+
+    for fixture in all_fixtures():
+        settings.metadata_prompt_token_budget = count_tokens(fixture.text[:LEGACY_CHAR_LIMIT])
+        legacy = extract_document_metadata_with_llm(fixture.text[:LEGACY_CHAR_LIMIT])
+        settings.metadata_prompt_token_budget = budget
+        compact = extract_document_metadata_with_llm(fixture.text)
+        diffs = [
+            f"{name}: {getattr(legacy, name)!r} != {getattr(compact, name)!r}"
+            for name in LIVE_FIELDS
+            if getattr(legacy, name) != getattr(compact, name)
+        ]
+        print(f"{fixture.name:<22}{'identical' if not diffs else '; '.join(diffs)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--live", action="store_true", help="call the metadata model")
+    args = parser.parse_args()
+
+    run_offline(args.budget)
+    if args.live:
+        print()
+        run_live(args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Serialization cost of the document list/text endpoints, default path vs fast path.
+
+Run from ``backend/``:
+
+    uv run python -m benchmarks.bench_serialization [--docs 1000] [--text-kb 20] [--repeat 5]
+
+The default path mirrors what FastAPI does for ``response_model``: load ORM objects, validate
+them into ``TaxDocumentMetadata``, dump to JSON-compatible data and ``json.dumps`` it. The fast
+path projects the metadata columns and encodes the rows with orjson. Both run against an
+in-memory SQLite copy of the schema, so query cost is included.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.responses import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.main import METADATA_COLUMNS, Base, TaxDocumentMetadata, TaxDocumentORM
+
+METADATA_LIST = TypeAdapter(list[TaxDocumentMetadata])
+
+
+def seed(session, docs: int, text_kb: int) -> None:
+    rng = random.Random(7)
+    words = ["wages", "withheld", "1099-B", "proceeds", "basis", "2024", "NORTHWIND", "box"]
+    started = datetime(2025, 1, 1)
+    for i in range(docs):
+        text = " ".join(rng.choice(words) for _ in range(text_kb * 1024 // 7))
+        session.add(
+            TaxDocumentORM(
+                id=f"doc-{i:06d}",
+                original_filename=f"statement-{i}.pdf",
+                storage_path=f"/uploads/{i}.pdf",
+                doc_type=rng.choice(["w2", "1099_b", "1099_int", "k1"]),
+                tax_year=2024,
+                payer_name="NORTHWIND SECURITIES LLC",
+                taxpayer_name="Jane Q Taxpayer",
+                num_pages=rng.randint(1, 40),
+                ingested_at=started + timedelta(minutes=i),
+                full_text=text,
+                status="completed",
+                extraction_version="v2-benchmark",
+            )
+        )
+    session.commit()
+
+
+def default_list(session) -> bytes:
+    docs = session.query(TaxDocumentORM).order_by(TaxDocumentORM.ingested_at.desc()).all()
+    validated = METADATA_LIST.validate_python(docs, from_attributes=True)
+    content = METADATA_LIST.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_list(session) -> bytes:
+    rows = session.query(*METADATA_COLUMNS).order_by(TaxDocumentORM.ingested_at.desc()).all()
+    return orjson.dumps([row._asdict() for row in rows])
+
+
+def timed(fn, repeat: int) -> tuple[float, bytes]:
+    samples = []
+    result = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--text-kb", type=int, default=20, help="full_text size per document")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)  # noqa: N806
+    with Session() as session:
+        seed(session, args.docs, args.text_kb)
+
+    print(f"list endpoint, {args.docs} documents with {args.text_kb} KB of text each")
+    per_1k = 1000 / args.docs
+    results = {}
+    for name, fn in (("default", default_list), ("fast", fast_list)):
+        with Session() as session:
+            ms, body = timed(lambda: fn(session), args.repeat)
+            session.expunge_all()
+        results[name] = ms
+        print(f"  {name:<8}{ms * per_1k:>9.1f} ms / 1k docs   {len(body):>10,} bytes")
+    print(f"  speedup  {results['default'] / results['fast']:>9.1f}x")
+
+    with Session() as session:
+        doc = session.query(TaxDocumentORM).first()
+        payload = {"id": doc.id, "full_text": doc.full_text * 250}
+    default_ms, body = timed(
+        lambda: json.dumps(payload, ensure_ascii=False).encode("utf-8"), args.repeat
+    )
+    fast_ms, _ = timed(lambda: orjson.dumps(payload), args.repeat)
+    print(f"\ntext endpoint, {len(body) / 1e6:.1f} MB full_text")
+    print(f"  json.dumps {default_ms:>7.1f} ms   orjson {fast_ms:>7.1f} ms")
+
+    gzip_ms, gzipped = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), 1)
+    print(f"  gzip       {gzip_ms:>7.1f} ms   {len(gzipped):>10,} bytes")
+    if brotli is not None:
+        br_ms, compressed = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY), 1)
+        print(f"  brotli     {br_ms:>7.1f} ms   {len(compressed):>10,} bytes")
+    else:
+        print("  brotli     not installed (pip install taxgpt-backend[brotli])")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Synthetic extracted-text fixtures shaped like real pypdf/OCR output."""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class DocumentFixture:
+    name: str
+    text: str
+    # Substrings the metadata extractor needs to see to get the answer right.
+    expected: dict[str, str] = field(default_factory=dict)
+
+
+def w2_fixture() -> DocumentFixture:
+    text = """Form W-2 Wage and Tax Statement 2024
+OMB No. 1545-0008
+a Employee's social security number   XXX-XX-1234
+b Employer identification number (EIN)   12-3456789
+c Employer's name, address, and ZIP code
+ACME WIDGETS INCORPORATED
+100 Industrial Way
+Springfield, IL 62701
+e Employee's first name and initial   Last name
+JANE Q   TAXPAYER
+1 Wages, tips, other compensation   85,250.00
+2 Federal income tax withheld   12,310.44
+3 Social security wages   85,250.00
+4 Social security tax withheld   5,285.50
+Department of the Treasury - Internal Revenue Service
+"""
+    return DocumentFixture(
+        name="w2_single_page",
+        text=text,
+        expected={
+            "doc_type": "Form W-2",
+            "tax_year": "2024",
+            "payer_name": "ACME WIDGETS INCORPORATED",
+            "taxpayer_name": "JANE Q TAXPAYER",
+            "payer_ein": "12-3456789",
+        },
+    )
+
+
+def brokerage_fixture(pages: int = 40, rows_per_page: int = 45) -> DocumentFixture:
+    header = "NORTHWIND SECURITIES LLC    Account 5521-9931    2024 Consolidated Form 1099"
+    footer = "Member SIPC. Statement period Jan 1 - Dec 31, 2024.    Page {page} of {pages}"
+    summary = f"""{header}
+2024 TAX REPORTING STATEMENT
+Form 1099-B Proceeds From Broker and Barter Exchange Transactions
+OMB No. 1545-0715
+PAYER'S name, street address, city, state, ZIP code
+NORTHWIND SECURITIES LLC
+1 Harbor Plaza, New York, NY 10004
+PAYER'S TIN 98-7654321
+RECIPIENT'S name
+JOHN   A.   INVESTOR
+RECIPIENT'S TIN XXX-XX-6789
+Summary of proceeds, gains & losses
+Short-term  Proceeds 152,331.20  Cost basis 140,112.00
+Long-term   Proceeds 98,410.55   Cost basis 71,220.10
+"""
+    parts = [summary, footer.format(page=1, pages=pages)]
+    for page in range(2, pages + 1):
+        parts.append(header)
+        parts.append("Date Acquired    Date Sold    Description    Quantity    Proceeds    Cost")
+        for row in range(rows_per_page):
+            parts.append(
+                f"01/{(row % 28) + 1:02d}/2023    06/{(row % 28) + 1:02d}/2024    "
+                f"SYMBOL{page:02d}{row:02d} COMMON STOCK    {row + 10}.000    "
+                f"{(row + 1) * 101.37:,.2f}    {(row + 1) * 95.12:,.2f}"
+            )
+        parts.append(footer.format(page=page, pages=pages))
+    return DocumentFixture(
+        name="brokerage_40_pages",
+        text="\n".join(parts),
+        expected={
+            "doc_type": "Form 1099-B",
+            "tax_year": "2024",
+            "payer_name": "NORTHWIND SECURITIES LLC",
+            "taxpayer_name": "JOHN A. INVESTOR",
+            "payer_ein": "98-7654321",
+        },
+    )
+
+
+def ocr_k1_fixture() -> DocumentFixture:
+    pages = [
+        "--- Page 1 ---\nSchedule K-1 (Form 1065) 2023\nPartner's Share of Income, Deductions, "
+        "Credits, etc.\nPart I Information About the Partnership\nA Partnership's employer "
+        "identification number 45-1112223\nB Partnership's name\nRIVERBEND REAL ESTATE FUND LP\n"
+        "Part II Information About the Partner\nE Partner's identifying number XXX-XX-4455\n"
+        "F Partner's name\nMARIA   GONZALEZ",
+    ]
+    for page in range(2, 9):
+        body = "\n".join(
+            f"Line {line}: supplemental statement detail item {page}-{line}   $ {line * 17}.00"
+            for line in range(60)
+        )
+        pages.append(f"--- Page {page} ---\nSTATEMENT A - SUPPLEMENTAL INFORMATION\n{body}")
+    return DocumentFixture(
+        name="ocr_k1_8_pages",
+        text="\n\n".join(pages),
+        expected={
+            "doc_type": "Schedule K-1",
+            "tax_year": "2023",
+            "payer_name": "RIVERBEND REAL ESTATE FUND LP",
+            "taxpayer_name": "MARIA GONZALEZ",
+            "payer_ein": "45-1112223",
+        },
+    )
+
+
+def all_fixtures() -> list[DocumentFixture]:
+    return [w2_fixture(), brokerage_fixture(), ocr_k1_fixture()]
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import main
+
+
+@pytest.fixture(autouse=True)
+def isolated_database(tmp_path_factory):
+    """Point SessionLocal at an empty SQLite database instead of the developer's taxdocs.db."""
+
+    path = tmp_path_factory.mktemp("db") / "taxdocs.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    main.Base.metadata.create_all(engine)
+    main.SessionLocal.configure(bind=engine)
+
+    yield engine
+
+    main.SessionLocal.configure(bind=main.engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def stored_docs() -> list[str]:
+    """Four processed documents, oldest first, in the isolated database."""
+
+    rows = [
+        ("w2", "ACME", "completed"),
+        ("w2", "ACME", "completed"),
+        ("1099_int", "BANK", "completed"),
+        ("1099_int", None, "failed"),
+    ]
+    db = main.SessionLocal()
+    for i, (doc_type, payer_name, status) in enumerate(rows):
+        db.add(
+            main.TaxDocumentORM(
+                id=f"doc-{i}",
+                original_filename=f"{i}.pdf",
+                storage_path=f"/tmp/{i}.pdf",
+                doc_type=doc_type,
+                tax_year=2024,
+                payer_name=payer_name,
+                num_pages=1,
+                ingested_at=datetime(2025, 1, 1, 12, i, 0, 123456),
+                full_text=f"document {i} " * 200,
+                status=status,
+            )
+        )
+    db.commit()
+    db.close()
+    return [f"doc-{i}" for i in range(len(rows))]
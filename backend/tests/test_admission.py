@@ -0,0 +1,111 @@
+import pytest
+from fastapi import Request
+from httpx import ASGITransport, AsyncClient
+
+from app import main
+from app.core.config import settings
+from app.services.admission import AdmissionController, AdmissionRejectedError
+from app.services.storage import LocalShardedStorage
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _controller(clock: FakeClock, **limits: int) -> AdmissionController:
+    defaults = {
+        "max_inflight_jobs": 0,
+        "max_buffered_bytes": 0,
+        "per_client_max_inflight": 0,
+        "per_client_uploads_per_minute": 0,
+    }
+    return AdmissionController(**{**defaults, **limits}, clock=clock)
+
+
+def test_global_limits_reject_with_503_until_jobs_finish() -> None:
+    clock = FakeClock()
+    controller = _controller(clock, max_inflight_jobs=2, max_buffered_bytes=100)
+
+    first = controller.admit("a", 60)
+    with pytest.raises(AdmissionRejectedError) as buffer_full:
+        controller.admit("b", 50)
+    second = controller.admit("b", 40)
+    with pytest.raises(AdmissionRejectedError) as queue_full:
+        controller.admit("c", 0)
+
+    assert (buffer_full.value.status_code, buffer_full.value.reason) == (503, "buffer_full")
+    assert (queue_full.value.status_code, queue_full.value.reason) == (503, "queue_full")
+
+    clock.now += 12
+    controller.release(first)
+    controller.release(first)  # releasing twice is harmless
+    controller.admit("c", 0)
+
+    snapshot = controller.snapshot()
+    assert snapshot["inflight_jobs"] == 2
+    assert snapshot["buffered_bytes"] == second.size_bytes
+    assert snapshot["rejected_total"] == {"buffer_full": 1, "queue_full": 1}
+    assert snapshot["avg_job_seconds"] == 12
+
+
+def test_per_client_quotas_reject_with_429() -> None:
+    clock = FakeClock()
+    controller = _controller(clock, per_client_max_inflight=2, per_client_uploads_per_minute=3)
+
+    tickets = [controller.admit("a", 0), controller.admit("a", 0)]
+    with pytest.raises(AdmissionRejectedError) as inflight:
+        controller.admit("a", 0)
+    controller.admit("b", 0)  # other clients are unaffected
+
+    controller.release(tickets[0])
+    clock.now += 20
+    controller.admit("a", 0)
+    controller.release(tickets[1])
+    with pytest.raises(AdmissionRejectedError) as rate:
+        controller.admit("a", 0)
+
+    assert (inflight.value.status_code, inflight.value.reason) == (429, "client_inflight")
+    assert (rate.value.status_code, rate.value.reason) == (429, "client_rate")
+    assert rate.value.retry_after == 40
+
+
+@pytest.mark.asyncio
+async def test_ingest_returns_503_with_retry_after_when_saturated(monkeypatch, tmp_path) -> None:
+    controller = _controller(FakeClock(), max_inflight_jobs=1)
+    controller.admit("someone-else", 0)
+    monkeypatch.setattr(main, "admission", controller)
+    monkeypatch.setattr(main, "get_storage", lambda: LocalShardedStorage(tmp_path))
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.post(
+            "/api/documents/ingest",
+            files={"file": ("w2.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+        metrics = await client.get("/api/ingest/metrics")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+    assert list(tmp_path.iterdir()) == []
+    assert metrics.json()["rejected_total"] == {"queue_full": 1}
+
+
+def test_only_configured_api_keys_get_their_own_quota(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "admission_api_keys", "partner-key, other-key")
+
+    def client_id(**headers: str) -> str:
+        scope = {
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": ("203.0.113.7", 5000),
+        }
+        return main.admission_client_id(Request(scope))
+
+    assert client_id() == "ip:203.0.113.7"
+    assert client_id(**{"X-API-Key": "made-up"}) == "ip:203.0.113.7"
+    assert client_id(**{"X-API-Key": "partner-key"}).startswith("key:")
+    assert client_id(**{"X-API-Key": "partner-key"}) != client_id(**{"X-API-Key": "other-key"})
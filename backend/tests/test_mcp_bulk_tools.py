@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from app import main
+from app.core.config import settings
+
+
+def test_bulk_fetch_selects_fields_keeps_order_and_reports_missing(stored_docs) -> None:
+    ids = [stored_docs[2], "doc-missing", stored_docs[0], stored_docs[2]]
+
+    result = main.get_tax_documents_tool(ids, fields=["doc_type", "payer_name"])
+
+    assert result.documents == [
+        {"id": stored_docs[2], "doc_type": "1099_int", "payer_name": "BANK"},
+        {"id": stored_docs[0], "doc_type": "w2", "payer_name": "ACME"},
+    ]
+    assert result.missing_ids == ["doc-missing"]
+    assert result.truncated_ids == []
+
+
+def test_bulk_fetch_caps_text_per_document_and_per_call(monkeypatch, stored_docs) -> None:
+    full_length = len("document 0 " * 200)
+
+    per_doc = main.get_tax_documents_tool(
+        stored_docs[:2], fields=["full_text"], max_text_chars_per_document=15
+    )
+    monkeypatch.setattr(settings, "mcp_batch_max_text_chars", full_length + 20)
+    per_call = main.get_tax_documents_tool(stored_docs, fields=["full_text"])
+
+    assert [doc["full_text"] for doc in per_doc.documents] == ["document 0 docu", "document 1 docu"]
+    assert per_doc.truncated_ids == stored_docs[:2]
+    assert [len(doc["full_text"]) for doc in per_call.documents] == [full_length, 20, 0, 0]
+    assert per_call.truncated_ids == stored_docs[1:]
+
+
+def test_bulk_fetch_rejects_oversized_batches_and_unknown_fields(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "mcp_batch_max_documents", 2)
+
+    with pytest.raises(ValueError, match="Too many documents"):
+        main.get_tax_documents_tool(["a", "b", "c"])
+    with pytest.raises(ValueError, match="Unknown fields: storage_path"):
+        main.get_tax_documents_tool(["a"], fields=["storage_path"])
+
+
+def test_aggregate_groups_counts_and_ids(monkeypatch, stored_docs) -> None:
+    monkeypatch.setattr(settings, "mcp_aggregate_max_ids_per_group", 1)
+
+    result = main.aggregate_tax_documents_tool(["doc_type", "status"])
+    by_payer = main.aggregate_tax_documents_tool(
+        ["payer_name"], status="completed", include_doc_ids=False
+    )
+
+    assert result.total == 4
+    assert [(group.key, group.count, group.doc_ids) for group in result.groups] == [
+        ({"doc_type": "1099_int", "status": "completed"}, 1, [stored_docs[2]]),
+        ({"doc_type": "1099_int", "status": "failed"}, 1, [stored_docs[3]]),
+        ({"doc_type": "w2", "status": "completed"}, 2, [stored_docs[1]]),
+    ]
+    assert [(group.key, group.count, group.doc_ids) for group in by_payer.groups] == [
+        ({"payer_name": "ACME"}, 2, []),
+        ({"payer_name": "BANK"}, 1, []),
+    ]
+
+
+def test_aggregate_lists_newest_ids_first_per_group(stored_docs) -> None:
+    result = main.aggregate_tax_documents_tool(["doc_type"], tax_year=2024)
+
+    assert {group.key["doc_type"]: group.doc_ids for group in result.groups} == {
+        "1099_int": [stored_docs[3], stored_docs[2]],
+        "w2": [stored_docs[1], stored_docs[0]],
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_tools_over_mcp(stored_docs) -> None:
+    async with create_connected_server_and_client_session(main.mcp_server._mcp_server) as client:
+        fetched = await client.call_tool("get_tax_documents_tool", {"doc_ids": stored_docs[:2]})
+        aggregated = await client.call_tool(
+            "aggregate_tax_documents_tool", {"group_by": ["tax_year"], "tax_year": 2024}
+        )
+
+    documents = json.loads(fetched.content[0].text)["documents"]
+    assert [doc["ingested_at"] for doc in documents] == [
+        "2025-01-01T12:00:00.123456",
+        "2025-01-01T12:01:00.123456",
+    ]
+    assert aggregated.structuredContent["groups"][0]["count"] == 4
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app import cli, main
+from app.main import parse_metadata_batch_output
+from app.services.metadata_batching import MetadataBatcher
+
+
+class RecordingExtractor:
+    def __init__(self, skip: frozenset[str] = frozenset(), fail_batch: bool = False) -> None:
+        self.skip = skip
+        self.fail_batch = fail_batch
+        self.batches: list[list[str]] = []
+        self.singles: list[str] = []
+        self._lock = threading.Lock()
+
+    def extract_batch(self, texts: dict[str, str]) -> dict[str, str]:
+        with self._lock:
+            self.batches.append(sorted(texts))
+        if self.fail_batch:
+            raise ValueError("rate limited")
+        return {
+            doc_id: f"batch:{text}" for doc_id, text in texts.items() if doc_id not in self.skip
+        }
+
+    def extract_one(self, text: str) -> str:
+        with self._lock:
+            self.singles.append(text)
+        return f"single:{text}"
+
+
+def _submit_all(batcher: MetadataBatcher[str], count: int) -> list[str]:
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda i: batcher.extract(f"doc-{i}", f"text-{i}"), range(count)))
+
+
+def test_concurrent_documents_share_batched_requests() -> None:
+    extractor = RecordingExtractor()
+    batcher = MetadataBatcher(extractor.extract_batch, extractor.extract_one, 5, max_wait_ms=200)
+
+    results = _submit_all(batcher, 10)
+
+    assert results == [f"batch:text-{i}" for i in range(10)]
+    assert sum(len(batch) for batch in extractor.batches) == 10
+    assert all(len(batch) <= 5 for batch in extractor.batches)
+    assert len(extractor.batches) < 10
+
+
+def test_documents_missing_from_batch_fall_back_to_single_calls() -> None:
+    extractor = RecordingExtractor(skip=frozenset({"doc-1"}))
+    batcher = MetadataBatcher(extractor.extract_batch, extractor.extract_one, 2, max_wait_ms=1000)
+
+    results = _submit_all(batcher, 2)
+
+    assert results == ["batch:text-0", "single:text-1"]
+    assert extractor.singles == ["text-1"]
+
+
+def test_failed_batch_falls_back_for_every_document() -> None:
+    extractor = RecordingExtractor(fail_batch=True)
+    batcher = MetadataBatcher(extractor.extract_batch, extractor.extract_one, 3, max_wait_ms=1000)
+
+    results = _submit_all(batcher, 3)
+
+    assert results == [f"single:text-{i}" for i in range(3)]
+
+
+def test_batch_size_of_one_disables_batching() -> None:
+    extractor = RecordingExtractor()
+    batcher = MetadataBatcher(extractor.extract_batch, extractor.extract_one, 1, max_wait_ms=1000)
+
+    assert batcher.extract("doc-0", "text-0") == "single:text-0"
+    assert extractor.batches == []
+
+
+def test_parse_metadata_batch_output_skips_failed_lines() -> None:
+    extraction = {
+        "doc_type": "w2",
+        "tax_year": 2024,
+        "payer_name": "ACME",
+        "taxpayer_name": "Jane Doe",
+        "taxpayer_ssn": None,
+        "payer_ein": None,
+        "confidence": 0.9,
+        "extraction_notes": None,
+    }
+    ok = {
+        "custom_id": "doc-ok",
+        "response": {
+            "status_code": 200,
+            "body": {
+                "status": "completed",
+                "output": [{"content": [{"type": "output_text", "text": json.dumps(extraction)}]}],
+            },
+        },
+        "error": None,
+    }
+    failed = {"custom_id": "doc-failed", "response": {"status_code": 429, "body": {}}}
+
+    results = parse_metadata_batch_output("\n".join(json.dumps(line) for line in (ok, failed)))
+
+    assert list(results) == ["doc-ok"]
+    assert results["doc-ok"].payer_name == "ACME"
+
+
+def test_fallback_calls_run_in_parallel() -> None:
+    # Each fallback call waits for the other two, so this only finishes if they overlap.
+    barrier = threading.Barrier(3, timeout=5)
+    extractor = RecordingExtractor(fail_batch=True)
+
+    def extract_one(text: str) -> str:
+        barrier.wait()
+        return extractor.extract_one(text)
+
+    batcher = MetadataBatcher(
+        extractor.extract_batch, extract_one, 3, max_wait_ms=1000, max_concurrency=4
+    )
+
+    assert _submit_all(batcher, 3) == [f"single:text-{i}" for i in range(3)]
+
+
+def test_batch_response_with_duplicate_doc_ids_is_rejected(monkeypatch) -> None:
+    extraction = {
+        "doc_type": "w2",
+        "tax_year": 2024,
+        "payer_name": "ACME",
+        "taxpayer_name": "Jane Doe",
+        "taxpayer_ssn": None,
+        "payer_ein": None,
+        "confidence": 0.9,
+        "extraction_notes": None,
+    }
+    parsed = main.TaxDocumentBatchExtraction.model_validate(
+        {"documents": [{"doc_id": "doc-0", **extraction}, {"doc_id": "doc-0", **extraction}]}
+    )
+
+    class FakeClient:
+        class responses:  # noqa: N801
+            @staticmethod
+            def parse(**kwargs):
+                return SimpleNamespace(status="completed", output=[], output_parsed=parsed)
+
+    monkeypatch.setattr(main, "get_openai_client", FakeClient)
+
+    with pytest.raises(ValueError, match="more than one extraction for: doc-0"):
+        main.extract_documents_metadata_batch_with_llm({"doc-0": "a", "doc-1": "b"})
+
+
+def test_strict_schema_requires_every_field_and_forbids_extras() -> None:
+    schema = main.strict_json_schema(main.TaxDocumentExtraction)
+
+    assert schema["additionalProperties"] is False
+    assert schema["required"] == list(main.TaxDocumentExtraction.model_fields)
+    assert "default" not in schema["properties"]["tax_year"]
+
+
+def test_concurrency_cap_applies_with_batching_disabled() -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def extract_one(text: str) -> str:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return f"single:{text}"
+
+    batcher = MetadataBatcher(
+        RecordingExtractor().extract_batch, extract_one, 1, max_wait_ms=0, max_concurrency=2
+    )
+
+    assert _submit_all(batcher, 6) == [f"single:text-{i}" for i in range(6)]
+    assert peak == 2
+
+
+def test_document_failed_by_pipeline_can_be_backfilled(monkeypatch, capsys) -> None:
+    db = main.SessionLocal()
+    db.add(main.TaxDocumentORM(id="doc-429", original_filename="w2.pdf", storage_path="w2.pdf"))
+    db.commit()
+    db.close()
+
+    def rate_limited(doc_id: str, text: str):
+        raise RuntimeError("429 Too Many Requests")
+
+    monkeypatch.setattr(main, "extract_text_and_page_count", lambda data, doc_id: ("Form W-2", 1))
+    monkeypatch.setattr(main.metadata_batcher, "extract", rate_limited)
+    main.process_document_async("doc-429", b"%PDF", "w2.pdf")
+
+    submitted: dict[str, str] = {}
+    extraction = main.TaxDocumentExtraction(
+        doc_type="w2", tax_year=2024, payer_name="ACME", taxpayer_name="Jane Doe", confidence=0.9
+    )
+
+    def submit(texts: dict[str, str]) -> str:
+        submitted.update(texts)
+        return "batch_1"
+
+    monkeypatch.setattr(cli, "submit_metadata_batch_job", submit)
+    monkeypatch.setattr(
+        cli, "collect_metadata_batch_job", lambda batch_id: ("completed", {"doc-429": extraction})
+    )
+
+    assert cli.main(["backfill-metadata", "--status", "failed"]) == 0
+
+    db = main.SessionLocal()
+    doc = db.get(main.TaxDocumentORM, "doc-429")
+    db.close()
+    assert submitted == {"doc-429": "Form W-2"}
+    assert (doc.status, doc.doc_type, doc.num_pages) == ("completed", "w2", 1)
+    assert "No documents to backfill" not in capsys.readouterr().out
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+
+from app import main
+from app.core.config import settings
+
+
+class ReviewlessClient:
+    """OpenAI stand-in whose review call fails, so the combined page text is returned."""
+
+    class responses:  # noqa: N801
+        @staticmethod
+        def parse(**kwargs):
+            raise RuntimeError("review unavailable")
+
+
+@pytest.fixture()
+def ocr_env(monkeypatch):
+    doc_id = f"test-{uuid.uuid4()}"
+    calls: list[int] = []
+    failing_pages: set[int] = set()
+
+    def fake_ocr(client, image, page_num, num_pages):
+        calls.append(page_num)
+        if page_num in failing_pages:
+            raise RuntimeError("vision API timeout")
+        return main.ImageTextExtraction(extracted_text=f"text of page {page_num}", confidence=0.9)
+
+    monkeypatch.setattr(main, "get_openai_client", ReviewlessClient)
+    monkeypatch.setattr(main, "convert_from_bytes", lambda *args, **kwargs: [object()])
+    monkeypatch.setattr(main, "ocr_page_image", fake_ocr)
+    monkeypatch.setattr(settings, "ocr_page_max_attempts", 2)
+    monkeypatch.setattr(settings, "ocr_page_retry_backoff_seconds", 0)
+
+    return doc_id, calls, failing_pages
+
+
+def test_failed_page_is_retried_and_run_resumes_from_it(ocr_env) -> None:
+    doc_id, calls, failing_pages = ocr_env
+    failing_pages.add(3)
+
+    with pytest.raises(ValueError, match="page 3 of 4 after 2 attempts"):
+        main.extract_text_from_pdf_images(b"%PDF scanned", 4, doc_id=doc_id)
+    assert calls == [1, 2, 3, 3]
+
+    failing_pages.clear()
+    calls.clear()
+    text = main.extract_text_from_pdf_images(b"%PDF scanned", 4, doc_id=doc_id)
+
+    assert calls == [3, 4]
+    assert text.count("--- Page") == 4
+    assert "text of page 1" in text and "text of page 4" in text
+
+    db = main.SessionLocal()
+    pages = db.query(main.OcrPageORM).filter(main.OcrPageORM.doc_id == doc_id).all()
+    db.close()
+    assert sorted(page.page_number for page in pages) == [1, 2, 3, 4]
+    assert {page.model for page in pages} == {main.OCR_MODEL}
+    assert all(page.confidence == 0.9 for page in pages)
+
+
+def test_checkpoint_is_discarded_when_file_changes(ocr_env) -> None:
+    doc_id, calls, _ = ocr_env
+
+    main.extract_text_from_pdf_images(b"%PDF v1", 2, doc_id=doc_id)
+    calls.clear()
+    main.extract_text_from_pdf_images(b"%PDF v2", 2, doc_id=doc_id)
+
+    assert calls == [1, 2]
+
+
+def test_checkpoint_is_deleted_once_the_document_completes(monkeypatch, ocr_env) -> None:
+    doc_id, _, _ = ocr_env
+    db = main.SessionLocal()
+    db.add(main.TaxDocumentORM(id=doc_id, original_filename="scan.pdf", storage_path="scan.pdf"))
+    db.commit()
+    db.close()
+
+    def extract_text(file_bytes, doc_id):
+        return main.extract_text_from_pdf_images(file_bytes, 2, doc_id=doc_id), 2
+
+    extraction = main.TaxDocumentExtraction(
+        doc_type="w2", tax_year=2024, payer_name="ACME", taxpayer_name="Jane Doe", confidence=0.9
+    )
+    monkeypatch.setattr(main, "extract_text_and_page_count", extract_text)
+    monkeypatch.setattr(main.metadata_batcher, "extract", lambda doc_id, text: extraction)
+
+    main.process_document_async(doc_id, b"%PDF scanned", "scan.pdf")
+
+    db = main.SessionLocal()
+    doc = db.get(main.TaxDocumentORM, doc_id)
+    pages = db.query(main.OcrPageORM).filter(main.OcrPageORM.doc_id == doc_id).count()
+    db.close()
+    assert doc.status == "completed"
+    assert "text of page 2" in doc.full_text
+    assert pages == 0
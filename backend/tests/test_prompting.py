@@ -0,0 +1,85 @@
+import logging
+
+import tiktoken
+
+from app.services.prompting import (
+    GAP_MARKER,
+    compact_document_text,
+    count_tokens,
+    dedupe_repeated_lines,
+    estimate_tokens,
+    get_token_counter,
+    normalize_whitespace,
+)
+
+
+def _statement(pages: int = 30) -> str:
+    header = "NORTHWIND SECURITIES LLC   2024 Consolidated Statement"
+    parts = [
+        header,
+        "Form 1099-B Proceeds From Broker Transactions",
+        "PAYER'S TIN 98-7654321",
+        "RECIPIENT'S name",
+        "JOHN INVESTOR",
+    ]
+    for page in range(2, pages + 1):
+        parts.append(header)
+        parts.extend(
+            f"06/{row + 1:02d}/2024  SYMBOL{page}{row}  {row * 1.5:.2f}" for row in range(40)
+        )
+        if page == pages // 2:
+            parts.append("Employer identification number (EIN) 11-2223334")
+    return "\n".join(parts)
+
+
+def test_normalize_whitespace_collapses_runs_and_blank_lines() -> None:
+    text = "Form  W-2\t\t2024   \n\n\n\nEmployer's   name\n"
+
+    assert normalize_whitespace(text) == "Form W-2 2024\n\nEmployer's name"
+
+
+def test_dedupe_repeated_lines_keeps_first_header_only() -> None:
+    lines = ["HEADER", "a", "HEADER", "b", "HEADER", "c", "--- Page 2 ---"]
+
+    assert dedupe_repeated_lines(lines) == ["HEADER", "a", "b", "c", "--- Page 2 ---"]
+
+
+def test_short_document_is_sent_whole() -> None:
+    text = "Form W-2 2024\nEmployer's name ACME\nEmployee's name JANE DOE"
+
+    result = compact_document_text(text, token_budget=500)
+
+    assert result.text == text
+    assert not result.truncated
+
+
+def test_long_document_fits_budget_and_keeps_identifying_regions() -> None:
+    text = _statement()
+
+    result = compact_document_text(text, token_budget=400)
+
+    assert result.truncated
+    assert result.compacted_tokens <= 400
+    assert result.compacted_tokens == count_tokens(result.text)
+    assert result.original_tokens > 4 * result.compacted_tokens
+    assert result.text.startswith("NORTHWIND SECURITIES LLC 2024 Consolidated Statement")
+    assert result.text.count("NORTHWIND SECURITIES LLC") == 1
+    assert "JOHN INVESTOR" in result.text
+    assert "11-2223334" in result.text
+    assert GAP_MARKER in result.text
+
+
+def test_missing_tokenizer_falls_back_to_estimate_with_warning(monkeypatch, caplog) -> None:
+    def unavailable(name: str):
+        raise OSError("no network")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", unavailable)
+    get_token_counter.cache_clear()
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.services.prompting"):
+            counter = get_token_counter()
+    finally:
+        get_token_counter.cache_clear()
+
+    assert counter is estimate_tokens
+    assert "o200k_base encoding unavailable (no network)" in caplog.text
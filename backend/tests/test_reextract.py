@@ -0,0 +1,180 @@
+import uuid
+
+import pytest
+
+from app import cli
+from app.core.config import settings
+from app.main import (
+    EXTRACTION_VERSION,
+    SessionLocal,
+    TaxDocumentExtraction,
+    TaxDocumentORM,
+    compute_extraction_version,
+)
+
+
+@pytest.fixture()
+def stale_doc(tmp_path):
+    pdf_path = tmp_path / "stale.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 placeholder")
+    doc_id = f"test-{uuid.uuid4()}"
+
+    db = SessionLocal()
+    db.add(
+        TaxDocumentORM(
+            id=doc_id,
+            original_filename="stale.pdf",
+            storage_path=str(pdf_path),
+            status="completed",
+            payer_name="OLD",
+            full_text="old text",
+            extraction_version="v0-outdated",
+        )
+    )
+    db.commit()
+    db.close()
+
+    return doc_id
+
+
+def test_extraction_version_tracks_prompt_settings(monkeypatch) -> None:
+    assert compute_extraction_version() == EXTRACTION_VERSION
+
+    monkeypatch.setattr(settings, "metadata_prompt_token_budget", 999)
+
+    assert compute_extraction_version() != EXTRACTION_VERSION
+
+
+def test_checkpoint_ignores_other_versions_and_torn_lines(tmp_path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    cli.Checkpoint(path, "v-old").record("a", "completed")
+    checkpoint = cli.Checkpoint(path, "v-new")
+    checkpoint.record("b", "failed", "boom")
+    with path.open("a") as f:
+        f.write('{"doc_id": "c", "vers')
+
+    assert checkpoint.load() == {"b": "failed"}
+
+
+class FakePipeline:
+    """Stands in for text and metadata extraction; fails for doc ids listed in ``failing``."""
+
+    def __init__(self) -> None:
+        self.failing: set[str] = set()
+        self.processed: list[str] = []
+
+    def extract_text(self, file_bytes: bytes, doc_id: str) -> tuple[str, int]:
+        return f"new text of {doc_id}", 2
+
+    def extract_metadata(self, doc_id: str, text: str) -> TaxDocumentExtraction:
+        self.processed.append(doc_id)
+        if doc_id in self.failing:
+            raise RuntimeError("429 Too Many Requests")
+        return TaxDocumentExtraction(
+            doc_type="w2", tax_year=2024, payer_name="NEW", taxpayer_name="Jane", confidence=0.9
+        )
+
+
+@pytest.fixture()
+def pipeline(monkeypatch) -> FakePipeline:
+    fake = FakePipeline()
+    monkeypatch.setattr(cli, "extract_text_and_page_count", fake.extract_text)
+    monkeypatch.setattr(cli.metadata_batcher, "extract", fake.extract_metadata)
+    return fake
+
+
+def _reextract(tmp_path, *flags: str) -> int:
+    return cli.main(["reextract", "--checkpoint", str(tmp_path / "ckpt.jsonl"), *flags])
+
+
+def test_failed_reextraction_keeps_the_row_and_is_retried_on_request(
+    tmp_path, pipeline, stale_doc
+) -> None:
+    pipeline.failing.add(stale_doc)
+
+    assert _reextract(tmp_path) == 1
+    db = SessionLocal()
+    doc = db.get(TaxDocumentORM, stale_doc)
+    db.close()
+    assert (doc.status, doc.error_message, doc.full_text) == ("completed", None, "old text")
+    assert doc.payer_name == "OLD"
+
+    pipeline.failing.clear()
+    assert _reextract(tmp_path) == 0  # recorded as failed in the checkpoint, so skipped
+    assert _reextract(tmp_path, "--retry-failed") == 0
+    assert _reextract(tmp_path, "--retry-failed") == 0  # now up to date
+
+    db = SessionLocal()
+    doc = db.get(TaxDocumentORM, stale_doc)
+    db.close()
+    assert pipeline.processed == [stale_doc, stale_doc]
+    assert (doc.status, doc.payer_name, doc.num_pages) == ("completed", "NEW", 2)
+    assert doc.full_text == f"new text of {stale_doc}"
+    assert doc.extraction_version == EXTRACTION_VERSION
+
+
+def test_retry_failed_alone_picks_up_documents_marked_failed(tmp_path, pipeline) -> None:
+    pdf_path = tmp_path / "scan.pdf"
+    pdf_path.write_bytes(b"%PDF")
+    db = SessionLocal()
+    for doc_id in ("scan", "other"):
+        db.add(
+            TaxDocumentORM(
+                id=doc_id,
+                original_filename=f"{doc_id}.pdf",
+                storage_path=str(pdf_path),
+                status="failed",
+            )
+        )
+    db.commit()
+    db.close()
+    cli.Checkpoint(tmp_path / "ckpt.jsonl", EXTRACTION_VERSION).record("scan", "failed", "OCR")
+
+    assert _reextract(tmp_path, "--retry-failed") == 0
+    assert pipeline.processed == ["scan"]
+
+
+def test_backfill_does_not_mark_old_text_as_current(monkeypatch, stale_doc) -> None:
+    extraction = TaxDocumentExtraction(
+        doc_type="w2", tax_year=2024, payer_name="NEW", taxpayer_name="Jane", confidence=0.9
+    )
+    monkeypatch.setattr(cli, "submit_metadata_batch_job", lambda texts: "batch_1")
+    monkeypatch.setattr(
+        cli, "collect_metadata_batch_job", lambda batch_id: ("completed", {stale_doc: extraction})
+    )
+
+    assert cli.main(["backfill-metadata", "--doc-id", stale_doc]) == 0
+
+    db = SessionLocal()
+    doc = db.get(TaxDocumentORM, stale_doc)
+    db.close()
+    assert doc.payer_name == "NEW"
+    assert doc.extraction_version == "v0-outdated"
+
+
+def test_stale_query_skips_in_flight_documents_and_failed_unless_asked() -> None:
+    db = SessionLocal()
+    for status, version in [
+        ("pending", None),
+        ("processing", None),
+        ("completed", None),
+        ("completed", EXTRACTION_VERSION),
+        ("failed", None),
+    ]:
+        db.add(
+            TaxDocumentORM(
+                id=f"{status}-{version}",
+                original_filename="doc.pdf",
+                storage_path="doc.pdf",
+                status=status,
+                extraction_version=version,
+            )
+        )
+    db.commit()
+
+    default = {doc.id for doc in cli.stale_documents_query(db, include_failed=False)}
+    with_failed = {doc.id for doc in cli.stale_documents_query(db, include_failed=True)}
+    db.close()
+
+    assert default == {"completed-None"}
+    assert with_failed == {"completed-None", "failed-None"}
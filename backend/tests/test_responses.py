@@ -0,0 +1,45 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import main
+from app.core.config import settings
+
+
+async def _get(path: str, **headers: str):
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        return await client.get(path, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_default_serialization(monkeypatch, stored_docs) -> None:
+    default_list = await _get("/api/documents")
+    default_text = await _get(f"/api/documents/{stored_docs[0]}/text")
+
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    fast_list = await _get("/api/documents")
+    fast_text = await _get(f"/api/documents/{stored_docs[0]}/text")
+    missing = await _get("/api/documents/doc-missing/text")
+
+    assert fast_list.json() == default_list.json()
+    assert [doc["id"] for doc in fast_list.json()] == stored_docs[::-1]
+    assert fast_text.json() == default_text.json()
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_fast_path_compresses_large_bodies_when_accepted(monkeypatch, stored_docs) -> None:
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    path = f"/api/documents/{stored_docs[0]}/text"
+
+    # httpx decodes transparently; content-length still reports the bytes on the wire.
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        gzipped = await client.get(path, headers={"Accept-Encoding": "gzip"})
+        identity = await client.get(path, headers={"Accept-Encoding": "identity"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in gzipped.headers["vary"]
+    assert int(gzipped.headers["content-length"]) < len(identity.content) / 10
+    assert gzipped.json() == identity.json()
+    assert "content-encoding" not in identity.headers
@@ -0,0 +1,141 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import main
+from app.services.storage import (
+    LocalShardedStorage,
+    S3Storage,
+    StorageError,
+    inline_content_disposition,
+)
+
+
+def test_local_storage_shards_documents(tmp_path) -> None:
+    storage = LocalShardedStorage(tmp_path, shard_depth=2)
+
+    location = storage.save("abc.pdf", b"%PDF")
+
+    relative = storage.local_path(location).relative_to(tmp_path)
+    assert len(relative.parts) == 3
+    assert relative.name == "abc.pdf"
+    assert storage.read(location) == b"%PDF"
+
+    storage.delete(location)
+    assert not storage.exists(location)
+    with pytest.raises(StorageError):
+        storage.read(location)
+
+
+@pytest.fixture()
+def s3_storage():
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="taxdocs")
+        yield S3Storage(bucket="taxdocs", prefix="documents", client=client)
+
+
+def test_s3_storage_round_trip_and_presigned_urls(s3_storage) -> None:
+    location = s3_storage.save("abc.pdf", b"%PDF")
+
+    assert location.startswith("s3://taxdocs/documents/")
+    assert location == s3_storage.location_for("abc.pdf")
+    assert s3_storage.read(location) == b"%PDF"
+    assert "abc.pdf" in s3_storage.download_url(location, "w2.pdf")
+
+    upload = s3_storage.presigned_upload("def.pdf", "application/pdf", max_bytes=1024)
+    assert upload.fields["key"] == s3_storage.object_key("def.pdf")
+    assert "policy" in upload.fields
+
+    s3_storage.delete(location)
+    assert not s3_storage.exists(location)
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_then_register(monkeypatch, s3_storage) -> None:
+    queued: list[str] = []
+    monkeypatch.setattr(main, "get_storage", lambda: s3_storage)
+    monkeypatch.setattr(main, "process_stored_document", queued.append)
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        policy = await client.post(
+            "/api/v1/uploads/policy", json={"filename": "w2.pdf", "size_bytes": 2048}
+        )
+        assert policy.status_code == 200
+        doc_id = policy.json()["doc_id"]
+
+        missing = await client.post(
+            "/api/v1/documents", json={"doc_id": doc_id, "filename": "w2.pdf"}
+        )
+        assert missing.status_code == 404
+
+        # Stand-in for the browser POSTing to the presigned URL.
+        s3_storage.save(f"{doc_id}.pdf", b"%PDF")
+        registered = await client.post(
+            "/api/v1/documents", json={"doc_id": doc_id, "filename": "w2.pdf"}
+        )
+        file_response = await client.get(f"/api/documents/{doc_id}/file")
+
+    try:
+        assert registered.status_code == 200
+        assert registered.json()["status"] == "pending"
+        assert queued == [doc_id]
+        assert file_response.status_code == 307
+    finally:
+        db = main.SessionLocal()
+        db.query(main.TaxDocumentORM).filter(main.TaxDocumentORM.id == doc_id).delete()
+        db.commit()
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_file_endpoint_serves_documents_from_either_backend(
+    monkeypatch, tmp_path, s3_storage
+) -> None:
+    local_location = LocalShardedStorage(tmp_path).save("local.pdf", b"%PDF")
+    s3_location = s3_storage.save("remote.pdf", b"%PDF")
+    db = main.SessionLocal()
+    for doc_id, location in [("local", local_location), ("remote", s3_location)]:
+        db.add(
+            main.TaxDocumentORM(id=doc_id, original_filename=f"{doc_id}.pdf", storage_path=location)
+        )
+    db.commit()
+    db.close()
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        monkeypatch.setattr(main, "get_storage", lambda: s3_storage)
+        legacy = await client.get("/api/documents/local/file")
+        redirected = await client.get("/api/documents/remote/file")
+        monkeypatch.setattr(main, "get_storage", lambda: LocalShardedStorage(tmp_path))
+        unreachable = await client.get("/api/documents/remote/file")
+
+    assert (legacy.status_code, legacy.content) == (200, b"%PDF")
+    assert redirected.status_code == 307
+    assert unreachable.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_upload_policy_requires_direct_upload_backend(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(main, "get_storage", lambda: LocalShardedStorage(tmp_path))
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.post("/api/v1/uploads/policy", json={"filename": "w2.pdf"})
+
+    assert response.status_code == 501
+
+
+def test_download_url_quotes_awkward_filenames(s3_storage) -> None:
+    location = s3_storage.save("abc.pdf", b"%PDF")
+
+    url = s3_storage.download_url(location, 'Jane "JQ" Müller W-2.pdf')
+    disposition = parse_qs(urlparse(url).query)["response-content-disposition"][0]
+
+    assert disposition == "inline; filename*=utf-8''Jane%20%22JQ%22%20M%C3%BCller%20W-2.pdf"
+    assert inline_content_disposition("w2.pdf") == 'inline; filename="w2.pdf"'